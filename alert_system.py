@@ -5,10 +5,6 @@ Handles notifications for honeytoken detections via email and webhooks.
 
 import os
 import json
-import smtplib
-import requests
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from typing import Dict, List, Optional
 
@@ -101,6 +97,10 @@ class AlertSystem:
         if not self.config['email']['enabled']:
             return False
         
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+        
         config = self.config['email']
         
         # Create email
@@ -214,6 +214,8 @@ This is an automated alert from the Honeytoken Detection System.
         if not self.config['webhook']['enabled']:
             return []
         
+        import requests
+        
         urls = [url.strip() for url in self.config['webhook']['urls'] if url.strip()]
         results = []
         
@@ -247,6 +249,8 @@ This is an automated alert from the Honeytoken Detection System.
         if not self.config['slack']['enabled']:
             return False
         
+        import requests
+        
         webhook_url = self.config['slack']['webhook_url']
         
         payload = {
@@ -308,6 +312,8 @@ This is an automated alert from the Honeytoken Detection System.
         if not self.config['discord']['enabled']:
             return False
         
+        import requests
+        
         webhook_url = self.config['discord']['webhook_url']
         
         payload = {
@@ -358,6 +364,8 @@ This is an automated alert from the Honeytoken Detection System.
         if not self.config['teams']['enabled']:
             return False
         
+        import requests
+        
         webhook_url = self.config['teams']['webhook_url']
         
         payload = {
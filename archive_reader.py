@@ -0,0 +1,241 @@
+"""
+Archive Reader Module
+Streams the members of zip, tar and compressed files for scanning without extracting them to disk.
+"""
+
+import io
+import os
+import bz2
+import gzip
+import lzma
+import zlib
+import tarfile
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+ZIP_EXTENSIONS = {'.zip', '.jar', '.war', '.ear', '.whl', '.egg', '.nupkg', '.apk'}
+
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+COMPRESSION_MODULES = {'.gz': gzip, '.bz2': bz2, '.xz': lzma}
+
+# Archives larger than this on disk are skipped like oversized files
+MAX_ARCHIVE_SIZE = 256 * 1024 * 1024
+
+# Archives inside archives are read into memory, so they are capped separately
+MAX_NESTED_ARCHIVE_SIZE = 64 * 1024 * 1024
+
+# Uncompressed bytes one archive may expand to, nested archives included
+MAX_TOTAL_SIZE = 1024 * 1024 * 1024
+
+# Zip-bomb protection: data may expand to at most this many times its
+# compressed size. Short repetitive files legitimately compress far better,
+# so the ratio is only enforced past RATIO_CHECK_MIN_SIZE.
+MAX_COMPRESSION_RATIO = 100
+RATIO_CHECK_MIN_SIZE = 1024 * 1024
+
+# Levels of archives inside archives that are opened
+MAX_DEPTH = 2
+
+# Entries read from one archive, nested archives included
+MAX_MEMBERS = 100000
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Errors raised by the decompressors and archive modules on corrupt input
+ARCHIVE_ERRORS = (OSError, EOFError, RuntimeError, NotImplementedError, ValueError,
+                  zlib.error, lzma.LZMAError, zipfile.BadZipFile, tarfile.TarError)
+
+
+def archive_kind(path: str) -> Optional[str]:
+    """Kind of archive a file name denotes: 'zip', 'tar', 'compressed' or None."""
+    name = path.lower()
+    if name.endswith(TAR_EXTENSIONS):
+        return 'tar'
+    extension = os.path.splitext(name)[1]
+    if extension in ZIP_EXTENSIONS:
+        return 'zip'
+    if extension in COMPRESSION_MODULES:
+        return 'compressed'
+    return None
+
+
+def is_archive(path: str) -> bool:
+    """Check whether a file name denotes an archive or compressed file."""
+    return archive_kind(path) is not None
+
+
+def _ratio_exceeded(size: int, compressed_size: int) -> bool:
+    """Check whether data expanded suspiciously far beyond its compressed size."""
+    return size > RATIO_CHECK_MIN_SIZE and size > compressed_size * MAX_COMPRESSION_RATIO
+
+
+def _read_limited(stream: BinaryIO, limit: int, compressed_size: int = None) -> bytes:
+    """Read a stream in chunks, giving up as soon as it breaks a limit.
+    
+    Raises:
+        ValueError: If the data is larger than `limit` or expands beyond
+            MAX_COMPRESSION_RATIO times `compressed_size`
+    """
+    chunks = []
+    size = 0
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return b''.join(chunks)
+        size += len(chunk)
+        if size > limit:
+            raise ValueError(f"expands to more than {limit} bytes")
+        if compressed_size is not None and _ratio_exceeded(size, compressed_size):
+            raise ValueError(f"compression ratio above {MAX_COMPRESSION_RATIO}")
+        chunks.append(chunk)
+
+
+def _error(source: str, message: str) -> Dict:
+    """Scan error for an archive or member that was not (fully) read."""
+    return {'file': source, 'error': message, 'type': 'archive'}
+
+
+def iter_archive_items(path: str, scanner, errors: List[Dict] = None) -> Iterator[Dict]:
+    """Yield scan items for the text members of an archive, one member in memory at a time.
+    
+    Zip files (including jar, war and whl), tar files (plain, gzip, bzip2 or
+    xz compressed) and single gzip, bzip2 or xz compressed files are read as
+    streams. Members the scanner would skip by name or size and binary
+    members are left out; archives nested up to MAX_DEPTH levels are opened
+    in turn.
+    
+    Args:
+        path: Archive file
+        scanner: TokenScanner deciding which members are worth scanning
+        errors: List that unreadable archives and members breaking a size,
+            ratio or count limit are appended to
+    
+    Yields:
+        Dicts with source (`archive!member`, with a further `!member` per
+        nesting level), path (member name) and text
+    """
+    errors = errors if errors is not None else []
+    state = {'total': 0, 'members': 0}
+    try:
+        with open(path, 'rb') as f:
+            yield from _iter_archive(path, path, f, os.path.getsize(path), scanner, errors,
+                                     0, state)
+    except ARCHIVE_ERRORS as e:
+        errors.append(_error(path, f"Unreadable archive: {e}"))
+
+
+def _iter_archive(source: str, name: str, fileobj: BinaryIO, size: int, scanner,
+                  errors: List[Dict], depth: int, state: Dict) -> Iterator[Dict]:
+    """Yield scan items from an open archive of the kind its name denotes."""
+    kind = archive_kind(name)
+    if kind == 'zip':
+        yield from _iter_zip(source, fileobj, scanner, errors, depth, state)
+    elif kind == 'tar':
+        yield from _iter_tar(source, fileobj, size, scanner, errors, depth, state)
+    else:
+        # A single compressed file holds one member named like the file
+        # without its compression extension
+        member = os.path.basename(name)[:-len(os.path.splitext(name)[1])]
+        module = COMPRESSION_MODULES[os.path.splitext(name)[1].lower()]
+        if not (is_archive(member) or scanner.should_scan_path(member)):
+            return
+        with module.open(fileobj) as stream:
+            yield from _read_member(source, member, stream, None, size, scanner, errors,
+                                    depth, state)
+
+
+def _iter_zip(source: str, fileobj: BinaryIO, scanner, errors: List[Dict], depth: int,
+              state: Dict) -> Iterator[Dict]:
+    """Yield scan items from a zip file; skipped members are never decompressed."""
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            # Once members have expanded past MAX_TOTAL_SIZE (reported by
+            # _read_member) nothing more is decompressed
+            if state['total'] > MAX_TOTAL_SIZE or not _count_member(source, errors, state):
+                return
+            if info.is_dir() or not (is_archive(info.filename) or
+                                     scanner.should_scan_path(info.filename, info.file_size)):
+                continue
+            try:
+                with archive.open(info) as stream:
+                    yield from _read_member(source, info.filename, stream, info.file_size,
+                                            info.compress_size, scanner, errors, depth, state)
+            except ARCHIVE_ERRORS as e:
+                errors.append(_error(f"{source}!{info.filename}", f"Unreadable member: {e}"))
+
+
+def _iter_tar(source: str, fileobj: BinaryIO, size: int, scanner, errors: List[Dict],
+              depth: int, state: Dict) -> Iterator[Dict]:
+    """Yield scan items from a tar file, read front to back without seeking."""
+    expanded = 0
+    with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+        for member in archive:
+            if not _count_member(source, errors, state):
+                return
+            # Skipped members are still decompressed to get past them, so
+            # every member counts towards the limits
+            expanded += member.size
+            state['total'] += member.size
+            if state['total'] > MAX_TOTAL_SIZE or _ratio_exceeded(expanded, size):
+                errors.append(_error(source, "Stopped reading: archive expands beyond "
+                                             "its size or ratio limit"))
+                return
+            if not member.isfile() or not (is_archive(member.name) or
+                                           scanner.should_scan_path(member.name, member.size)):
+                continue
+            stream = archive.extractfile(member)
+            if stream is not None:
+                yield from _read_member(source, member.name, stream, member.size, None,
+                                        scanner, errors, depth, state, counted=True)
+
+
+def _count_member(source: str, errors: List[Dict], state: Dict) -> bool:
+    """Count an archive entry, reporting when there are too many to read."""
+    state['members'] += 1
+    if state['members'] > MAX_MEMBERS:
+        errors.append(_error(source, f"Stopped reading: more than {MAX_MEMBERS} entries"))
+        return False
+    return True
+
+
+def _read_member(source: str, name: str, stream: BinaryIO, file_size: Optional[int],
+                 compressed_size: Optional[int], scanner, errors: List[Dict], depth: int,
+                 state: Dict, counted: bool = False) -> Iterator[Dict]:
+    """Read one member within the limits and yield it, or the members of a nested archive."""
+    member_source = f"{source}!{name}"
+    nested = is_archive(name)
+    if nested and depth >= MAX_DEPTH:
+        errors.append(_error(member_source, f"Not opened: nested more than {MAX_DEPTH} deep"))
+        return
+    
+    limit = MAX_NESTED_ARCHIVE_SIZE if nested else scanner.MAX_FILE_SIZE
+    if file_size is not None and file_size > limit:
+        if nested:
+            errors.append(_error(member_source, f"Not opened: larger than {limit} bytes"))
+        return
+    
+    try:
+        data = _read_limited(stream, limit, compressed_size)
+    except ValueError as e:
+        errors.append(_error(member_source, f"Not scanned: {e}"))
+        return
+    if not counted:
+        state['total'] += len(data)
+        if state['total'] > MAX_TOTAL_SIZE:
+            errors.append(_error(member_source, f"Not scanned: archive expands to more "
+                                                f"than {MAX_TOTAL_SIZE} bytes"))
+            return
+    
+    if nested:
+        try:
+            yield from _iter_archive(member_source, name, io.BytesIO(data), len(data), scanner,
+                                     errors, depth + 1, state)
+        except ARCHIVE_ERRORS as e:
+            errors.append(_error(member_source, f"Unreadable archive: {e}"))
+        return
+    
+    # Binary members are not scanned
+    if b'\0' in data[:8000]:
+        return
+    yield {'source': member_source, 'path': name, 'text': data.decode('utf-8', errors='ignore')}
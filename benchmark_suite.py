@@ -0,0 +1,379 @@
+"""
+Benchmark Suite Module
+Measures scanner throughput on reproducible synthetic corpora and flags regressions.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import string
+import platform
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_BASELINE_FILE = os.path.join('.benchmarks', 'baseline.json')
+
+# Slowdown (as a fraction of the baseline time) reported as a regression
+DEFAULT_THRESHOLD = 0.15
+
+# benchmark name -> (scanner entry point, corpus)
+BENCHMARKS = {
+    'scan_text:source_tree': ('scan_text', 'source_tree'),
+    'scan_text:minified_js': ('scan_text', 'minified_js'),
+    'scan_text:single_line_json': ('scan_text', 'single_line_json'),
+    'scan_text:dense_findings': ('scan_text', 'dense_findings'),
+    'scan_file:source_tree': ('scan_file', 'source_tree'),
+    'scan_directory:source_tree': ('scan_directory', 'source_tree'),
+    'scan_directory:many_files': ('scan_directory', 'many_files'),
+    'scan_diff:diff_repo': ('scan_diff', 'diff_repo'),
+}
+
+
+def _random_token(rng: random.Random) -> str:
+    """Generate a token-shaped string matching one of the scanner patterns."""
+    alnum = string.ascii_letters + string.digits
+    kind = rng.randrange(4)
+    if kind == 0:
+        return 'ghp_' + ''.join(rng.choices(alnum, k=36))
+    if kind == 1:
+        return 'AKIA' + ''.join(rng.choices(string.ascii_uppercase + string.digits, k=16))
+    if kind == 2:
+        return 'xoxb-' + ''.join(rng.choices(string.digits, k=11)) + '-' + \
+            ''.join(rng.choices(string.digits, k=11)) + '-' + ''.join(rng.choices(alnum, k=24))
+    return 'sk_live_' + ''.join(rng.choices(alnum, k=24))
+
+
+def _identifier(rng: random.Random) -> str:
+    """Generate a short code identifier."""
+    return rng.choice(string.ascii_lowercase) + ''.join(
+        rng.choices(string.ascii_lowercase + string.digits + '_', k=rng.randint(2, 12))
+    )
+
+
+def _source_file(rng: random.Random, leak: bool) -> str:
+    """Generate a code-like source file, optionally with one leaked token."""
+    lines = []
+    for _ in range(rng.randint(50, 300)):
+        kind = rng.randrange(5)
+        name = _identifier(rng)
+        if kind == 0:
+            lines.append(f'def {name}({_identifier(rng)}, {_identifier(rng)}):')
+        elif kind == 1:
+            lines.append(f'    {name} = {_identifier(rng)}.get("{_identifier(rng)}", {rng.randint(0, 999)})')
+        elif kind == 2:
+            lines.append(f'    # {" ".join(_identifier(rng) for _ in range(rng.randint(3, 10)))}')
+        elif kind == 3:
+            lines.append(f'    return {name} + {rng.random():.6f}')
+        else:
+            lines.append('')
+    if leak:
+        lines.insert(rng.randrange(len(lines)), f'API_TOKEN = "{_random_token(rng)}"')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_source_tree(root: str, rng: random.Random, scale: float):
+    """Source files in nested packages; about 2% contain a token."""
+    extensions = ['.py', '.js', '.go', '.java', '.rb', '.yml']
+    for i in range(max(1, int(2000 * scale))):
+        directory = os.path.join(root, f'pkg{i % 20}', f'mod{i % 7}')
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'file{i}{rng.choice(extensions)}'), 'w') as f:
+            f.write(_source_file(rng, leak=rng.random() < 0.02))
+
+
+def generate_minified_js(root: str, rng: random.Random, scale: float):
+    """One multi-megabyte single-line JavaScript bundle."""
+    target = max(1024, int(8 * 1024 * 1024 * scale))
+    parts = []
+    size = 0
+    while size < target:
+        if rng.random() < 0.0005:
+            part = f'var k="{_random_token(rng)}";'
+        else:
+            part = (f'function {_identifier(rng)}({_identifier(rng)}){{return '
+                    f'{_identifier(rng)}.{_identifier(rng)}+"{_identifier(rng)}"}};')
+        parts.append(part)
+        size += len(part)
+    with open(os.path.join(root, 'bundle.min.js'), 'w') as f:
+        f.write(''.join(parts))
+
+
+def generate_single_line_json(root: str, rng: random.Random, scale: float):
+    """One multi-megabyte JSON document without line breaks."""
+    target = max(1024, int(8 * 1024 * 1024 * scale))
+    records = []
+    size = 0
+    while size < target:
+        record = {
+            'id': rng.randint(0, 10 ** 9),
+            'name': _identifier(rng),
+            'tags': [_identifier(rng) for _ in range(rng.randint(1, 5))],
+            'score': rng.random()
+        }
+        if rng.random() < 0.001:
+            record['token'] = _random_token(rng)
+        records.append(record)
+        size += 80
+    with open(os.path.join(root, 'data.json'), 'w') as f:
+        json.dump(records, f, separators=(',', ':'))
+
+
+def generate_dense_findings(root: str, rng: random.Random, scale: float):
+    """A file where every line holds a token."""
+    with open(os.path.join(root, 'secrets.env'), 'w') as f:
+        for i in range(max(1, int(50000 * scale))):
+            f.write(f'TOKEN_{i}={_random_token(rng)}\n')
+
+
+def generate_many_files(root: str, rng: random.Random, scale: float):
+    """A very wide tree of tiny files (100k at full scale)."""
+    for i in range(max(1, int(100000 * scale))):
+        directory = os.path.join(root, f'd{i // 1000}', f'd{i // 100 % 10}')
+        if i % 100 == 0:
+            os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'f{i}.txt'), 'w') as f:
+            f.write(f'{_identifier(rng)} = {rng.randint(0, 10 ** 6)}\n')
+
+
+def generate_diff_repo(root: str, rng: random.Random, scale: float):
+    """A git repository whose last commit edits a tenth of its files."""
+    def git(*args):
+        subprocess.run(['git', *args], cwd=root, check=True, capture_output=True,
+                       env=dict(os.environ, GIT_AUTHOR_NAME='bench', GIT_AUTHOR_EMAIL='b@example.com',
+                                GIT_COMMITTER_NAME='bench', GIT_COMMITTER_EMAIL='b@example.com'))
+    
+    git('init', '-q')
+    generate_source_tree(root, rng, scale / 4)
+    git('add', '-A')
+    git('commit', '-q', '-m', 'base')
+    git('tag', 'base')
+    
+    files = _corpus_files(root)
+    for path in rng.sample(files, max(1, len(files) // 10)):
+        with open(path, 'a') as f:
+            f.write(_source_file(rng, leak=rng.random() < 0.2))
+    git('commit', '-q', '-am', 'head')
+
+
+CORPORA: Dict[str, Callable] = {
+    'source_tree': generate_source_tree,
+    'minified_js': generate_minified_js,
+    'single_line_json': generate_single_line_json,
+    'dense_findings': generate_dense_findings,
+    'many_files': generate_many_files,
+    'diff_repo': generate_diff_repo,
+}
+
+
+def generate_corpora(corpus_dir: str, names: List[str], seed: int = 42, scale: float = 1.0):
+    """Generate corpora reproducibly; each one gets its own seeded generator."""
+    for name in names:
+        root = os.path.join(corpus_dir, name)
+        os.makedirs(root, exist_ok=True)
+        CORPORA[name](root, random.Random(f'{seed}:{name}'), scale)
+
+
+def _corpus_files(root: str) -> List[str]:
+    """List corpus files, leaving out git metadata."""
+    files = []
+    for directory, dirs, names in os.walk(root):
+        if '.git' in dirs:
+            dirs.remove('.git')
+        files.extend(os.path.join(directory, name) for name in names)
+    return sorted(files)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_benchmark(name: str, corpus_dir: str, repeat: int = 3) -> Dict:
+    """Run one benchmark in this process and return its best timing."""
+    from token_scanner import TokenScanner
+    
+    target, corpus = BENCHMARKS[name]
+    root = os.path.join(corpus_dir, corpus)
+    files = _corpus_files(root)
+    total_bytes = sum(os.path.getsize(path) for path in files)
+    # No honeytoken store and no history, so results only depend on the corpus
+    scanner = TokenScanner(honeytokens_file=os.path.join(corpus_dir, 'none.json'),
+                           persist=False)
+    
+    if target == 'scan_text':
+        texts = []
+        for path in files:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                texts.append((f.read(), path))
+        run = lambda: sum(len(scanner.scan_text(text, source=path)) for text, path in texts)
+    elif target == 'scan_file':
+        run = lambda: sum(len(scanner.scan_file(path)[0]) for path in files)
+    elif target == 'scan_directory':
+        run = lambda: scanner.scan_directory(root)['total_findings']
+    else:
+        from ci_scanner import CIScanner
+        
+        ci_scanner = CIScanner()
+        ci_scanner.scanner = scanner
+        changed = subprocess.run(['git', 'diff', '--name-only', 'base', 'HEAD'], cwd=root,
+                                 capture_output=True, text=True, check=True).stdout.split()
+        total_bytes = sum(os.path.getsize(os.path.join(root, path)) for path in changed)
+        files = changed
+        run = lambda: ci_scanner.scan_diff('base', 'HEAD', repo_path=root)['total_findings']
+    
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        findings = run()
+        timings.append(time.perf_counter() - started)
+    
+    seconds = min(timings)
+    return {
+        'benchmark': name,
+        'seconds': seconds,
+        'bytes': total_bytes,
+        'files': len(files),
+        'findings': findings,
+        'mb_per_s': total_bytes / (1024 * 1024) / seconds if seconds else None,
+        'files_per_s': len(files) / seconds if seconds else None,
+        'peak_rss_mb': _peak_rss_mb()
+    }
+
+
+def run_suite(corpus_dir: str, names: List[str], repeat: int = 3) -> List[Dict]:
+    """Run benchmarks, each in a fresh interpreter so peak RSS is its own."""
+    results = []
+    for name in names:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run-one', name,
+             '--corpus-dir', corpus_dir, '--repeat', str(repeat)],
+            cwd=corpus_dir, capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            results.append({'benchmark': name, 'error': output.stderr.strip().splitlines()[-1:]})
+            continue
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def compare_results(results: List[Dict], baseline: Dict,
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Compare timings against a stored baseline.
+    
+    Returns:
+        Benchmarks slower than the baseline by more than `threshold`
+    """
+    previous = {r['benchmark']: r for r in baseline.get('results', []) if 'seconds' in r}
+    regressions = []
+    for result in results:
+        before = previous.get(result['benchmark'])
+        if not before or 'seconds' not in result or not before['seconds']:
+            continue
+        change = result['seconds'] / before['seconds'] - 1
+        result['change'] = change
+        if change > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    """CLI interface for the benchmark suite."""
+    import argparse
+    import shutil
+    import tempfile
+    
+    parser = argparse.ArgumentParser(description='Benchmark the token scanner')
+    parser.add_argument('--benchmarks', nargs='+', choices=sorted(BENCHMARKS),
+                       default=sorted(BENCHMARKS), help='Benchmarks to run (default: all)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                       help='Corpus size multiplier (1.0 = 100k-file tree, 8 MB bundles)')
+    parser.add_argument('--seed', type=int, default=42, help='Corpus random seed')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark (best is kept)')
+    parser.add_argument('--corpus-dir', help='Reuse or keep corpora in this directory')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE_FILE,
+                       help=f'Store results as a baseline (default: {DEFAULT_BASELINE_FILE})')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE_FILE,
+                       help='Compare against a stored baseline; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help='Slowdown fraction treated as a regression (default: 0.15)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    
+    args = parser.parse_args()
+    
+    if args.run_one:
+        print(json.dumps(run_benchmark(args.run_one, args.corpus_dir, args.repeat)))
+        return
+    
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix='honeytoken-bench-')
+    corpus_dir = os.path.abspath(corpus_dir)
+    needed = sorted({BENCHMARKS[name][1] for name in args.benchmarks})
+    missing = [name for name in needed if not os.path.isdir(os.path.join(corpus_dir, name))]
+    
+    try:
+        if missing:
+            print(f"Generating corpora (scale {args.scale}, seed {args.seed}): {', '.join(missing)}")
+            generate_corpora(corpus_dir, missing, seed=args.seed, scale=args.scale)
+        
+        results = run_suite(corpus_dir, args.benchmarks, repeat=args.repeat)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+    
+    regressions = []
+    if args.compare:
+        try:
+            with open(args.compare, 'r') as f:
+                baseline = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading baseline {args.compare}: {e}")
+            sys.exit(2)
+        if (baseline.get('scale'), baseline.get('seed')) != (args.scale, args.seed):
+            print("⚠️  Baseline was recorded with a different corpus scale or seed")
+        regressions = compare_results(results, baseline, args.threshold)
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"\n{'Benchmark':<30} {'Seconds':>8} {'MB/s':>8} {'Files/s':>9} "
+              f"{'RSS MB':>7} {'Change':>7}")
+        print("-" * 74)
+        for r in results:
+            if 'error' in r:
+                print(f"{r['benchmark']:<30} failed: {' '.join(r['error'])}")
+                continue
+            change = f"{r['change']:+.0%}" if 'change' in r else ''
+            rss = f"{r['peak_rss_mb']:.0f}" if r['peak_rss_mb'] is not None else '-'
+            print(f"{r['benchmark']:<30} {r['seconds']:>8.3f} {r['mb_per_s'] or 0:>8.1f} "
+                  f"{r['files_per_s'] or 0:>9.0f} {rss:>7} {change:>7}")
+    
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or '.', exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump({
+                'created_at': datetime.utcnow().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'scale': args.scale,
+                'seed': args.seed,
+                'results': results
+            }, f, indent=2)
+        print(f"\n✓ Baseline saved to: {args.save_baseline}")
+    
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than baseline by more than "
+              f"{args.threshold:.0%}: {', '.join(r['benchmark'] for r in regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
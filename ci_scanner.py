@@ -3,25 +3,71 @@ CI Scanner Module
 Integrates with CI/CD pipelines for automated token scanning.
 """
 
+import io
 import os
 import sys
+import hmac
 import json
+import hashlib
+import itertools
+import posixpath
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+
+DEFAULT_BASELINE_FILE = '.honeytoken-baseline.json'
+
+# Findings listed individually per report format (0 lists all). Markdown
+# tables and annotations are shown on pull requests, which cap their size.
+DEFAULT_MAX_FINDINGS = {'markdown': 100, 'github': 50}
+
+SARIF_TOOL_NAME = 'honeytoken-scanner'
+
+# Secret keying the SARIF token fingerprints; without it they are keyed by
+# the repository name, which still stops one hash table serving every repo
+FINGERPRINT_KEY_ENV = 'HONEYTOKEN_FINGERPRINT_KEY'
+
+
+def _normalize_path(path: str) -> str:
+    """Normalize a finding path so fingerprints match across platforms."""
+    path = posixpath.normpath(path.replace('\\', '/'))
+    return path[2:] if path.startswith('./') else path
+
+
+def finding_fingerprint(finding: Dict) -> str:
+    """Stable fingerprint of a finding from its type, hashed value and path."""
+    value_hash = hashlib.sha256(finding['token_value'].encode('utf-8')).hexdigest()
+    path = _normalize_path(finding.get('file_path') or finding['source'])
+    return hashlib.sha256(
+        f"{finding['token_type']}\0{value_hash}\0{path}".encode('utf-8')
+    ).hexdigest()
 
 
 class CIScanner:
     """Scanner designed for CI/CD pipeline integration."""
     
-    def __init__(self):
-        """Initialize CI scanner."""
+    def __init__(self, rule_packs: List[str] = None, file_time_budget: float = None,
+                 rule_time_budget: float = None, validate_checksums: bool = False,
+                 honeytokens_only: bool = False, scan_archives: bool = False):
+        """Initialize CI scanner; the options are passed on to TokenScanner."""
         from token_scanner import TokenScanner
-        from honeytoken_generator import HoneytokenGenerator
         
-        self.scanner = TokenScanner()
-        self.generator = HoneytokenGenerator()
+        self.scanner = TokenScanner(rule_packs=rule_packs, file_time_budget=file_time_budget,
+                                    rule_time_budget=rule_time_budget,
+                                    validate_checksums=validate_checksums,
+                                    honeytokens_only=honeytokens_only,
+                                    scan_archives=scan_archives)
+        self._generator = None
         self.ci_environment = self._detect_ci_environment()
     
+    @property
+    def generator(self):
+        """Honeytoken generator, created on first use."""
+        if self._generator is None:
+            from honeytoken_generator import HoneytokenGenerator
+            self._generator = HoneytokenGenerator()
+        return self._generator
+    
     def _detect_ci_environment(self) -> Dict:
         """Detect which CI/CD environment we're running in."""
         env_info = {
@@ -102,8 +148,8 @@ class CIScanner:
         
         return env_info
     
-    def scan_workspace(self, workspace_path: str = None) -> Dict:
-        """Scan the CI workspace for tokens."""
+    def scan_workspace(self, workspace_path: str = None, shard: Tuple[int, int] = None) -> Dict:
+        """Scan the CI workspace, or one (index, count) shard of it, for tokens."""
         if workspace_path is None:
             # Try to detect workspace path
             if self.ci_environment['platform'] == 'github_actions':
@@ -117,93 +163,428 @@ class CIScanner:
         
         print(f"\n🔍 Scanning workspace: {workspace_path}")
         print(f"   CI Platform: {self.ci_environment['platform']}")
+        if shard is not None:
+            print(f"   Shard: {shard[0] + 1} of {shard[1]}")
         
-        scan_result = self.scanner.scan_directory(workspace_path, recursive=True)
+        scan_result = self.scanner.scan_directory(workspace_path, recursive=True, shard=shard)
+        for finding in scan_result['findings']:
+            finding['file_path'] = os.path.relpath(finding['source'], workspace_path)
         
         # Add CI context
         scan_result['ci_environment'] = self.ci_environment
         
         return scan_result
     
-    def scan_diff(self, base_ref: str = None, head_ref: str = None) -> Dict:
-        """Scan only changed files in a pull request or commit."""
-        import subprocess
+    def merge_results(self, result_files: List[str]) -> Dict:
+        """Combine the JSON results of sharded workspace scans into one scan result.
+        
+        Raises:
+            ValueError: If a file is not a scan result, or the shards are
+                duplicated, missing or from differently sized splits
+        """
+        results = []
+        for result_file in result_files:
+            try:
+                with open(result_file, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise ValueError(f"{result_file}: {e}") from e
+            if not isinstance(result, dict) or 'findings' not in result:
+                raise ValueError(f"{result_file}: not a JSON scan result")
+            results.append(result)
         
-        # Determine refs to compare
+        shards = [r.get('shard') for r in results]
+        if any(shards):
+            if not all(shards):
+                raise ValueError("Cannot merge sharded and unsharded results")
+            count = shards[0]['count']
+            if any(shard['count'] != count for shard in shards):
+                raise ValueError("Results come from different shard counts")
+            indexes = sorted(shard['index'] for shard in shards)
+            if indexes != list(range(count)):
+                missing = sorted(set(range(count)) - set(indexes))
+                raise ValueError(f"Expected shards 0-{count - 1} once each; "
+                                 f"missing: {missing or 'none'}, got: {indexes}")
+            results.sort(key=lambda r: r['shard']['index'])
+        
+        findings = [f for r in results for f in r['findings']]
+        scan_result = {
+            'scan_id': datetime.utcnow().strftime('%Y%m%d%H%M%S'),
+            'scan_type': 'merged',
+            'started_at': min((r.get('started_at') or '' for r in results), default=''),
+            'shards': len(results),
+            'total_files_scanned': sum(r.get('total_files_scanned', 0) for r in results),
+            'total_files_skipped': sum(r.get('total_files_skipped', 0) for r in results),
+            'total_findings': len(findings),
+            'honeytokens_found': sum(1 for f in findings if f['is_honeytoken']),
+            'findings': findings,
+            'errors': [e for r in results for e in r.get('errors', [])],
+            'ci_environment': self.ci_environment
+        }
+        suppressed = sum(r.get('suppressed_findings', 0) for r in results)
+        if suppressed:
+            scan_result['suppressed_findings'] = suppressed
+        
+        return scan_result
+    
+    def _resolve_diff_refs(self, base_ref: str = None, head_ref: str = None) -> Tuple[str, str]:
+        """Fill in diff refs from the CI environment, defaulting to the last commit."""
         if self.ci_environment['platform'] == 'github_actions':
             if base_ref is None:
-                base_ref = os.getenv('GITHUB_BASE_REF') or 'HEAD^'
+                base_ref = os.getenv('GITHUB_BASE_REF')
             if head_ref is None:
-                head_ref = os.getenv('GITHUB_SHA') or 'HEAD'
+                head_ref = os.getenv('GITHUB_SHA')
+        return base_ref or 'HEAD^', head_ref or 'HEAD'
+    
+    def scan_diff(self, base_ref: str = None, head_ref: str = None,
+                  repo_path: str = '.') -> Dict:
+        """Scan only changed files in a pull request or commit.
         
-        try:
-            # Get list of changed files
-            result = subprocess.run(
-                ['git', 'diff', '--name-only', base_ref, head_ref],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            changed_files = [f.strip() for f in result.stdout.split('\n') if f.strip()]
-            
-            print(f"\n🔍 Scanning {len(changed_files)} changed file(s)")
-            
-            all_findings = []
-            scanned_files = []
-            errors = []
-            
-            for file_path in changed_files:
-                if not os.path.exists(file_path):
-                    continue
-                
-                if self.scanner.should_scan_file(file_path):
-                    findings, metadata = self.scanner.scan_file(file_path)
-                    
-                    if 'error' in metadata:
-                        errors.append({'file': file_path, 'error': metadata['error']})
-                    else:
-                        scanned_files.append(file_path)
-                        if findings:
-                            all_findings.extend(findings)
-            
-            return {
-                'scan_type': 'diff',
-                'base_ref': base_ref,
-                'head_ref': head_ref,
-                'changed_files': len(changed_files),
-                'scanned_files': len(scanned_files),
-                'total_findings': len(all_findings),
-                'honeytokens_found': sum(1 for f in all_findings if f['is_honeytoken']),
-                'findings': all_findings,
-                'errors': errors,
-                'ci_environment': self.ci_environment
-            }
+        File contents are read at `head_ref` from the object database through
+        one `git cat-file --batch` process, so no checkout of the head tree is
+        needed. Reading runs ahead of scanning on a separate thread.
+        """
+        import subprocess
+        from git_reader import GitBlobReader, iter_diff_blobs
+        
+        base_ref, head_ref = self._resolve_diff_refs(base_ref, head_ref)
         
-        except subprocess.CalledProcessError as e:
+        try:
+            changes = list(iter_diff_blobs(repo_path, base_ref, head_ref))
+        except (subprocess.CalledProcessError, OSError) as e:
             print(f"Error running git diff: {e}")
             return {
                 'scan_type': 'diff',
                 'error': str(e),
                 'ci_environment': self.ci_environment
             }
+        
+        print(f"\n🔍 Scanning {len(changes)} changed file(s)")
+        
+        to_read = [
+            (change['blob_sha'], change['path']) for change in changes
+            if change['blob_sha'] and self.scanner.should_scan_path(change['path'])
+        ]
+        all_findings = []
+        scanned_files = []
+        skipped_files = []
+        errors = []
+        
+        try:
+            with GitBlobReader(repo_path) as reader:
+                for (blob_sha, file_path), content in reader.iter_blobs(
+                        to_read, max_size=self.scanner.MAX_FILE_SIZE):
+                    # Oversized and binary blobs are not scanned
+                    if content is None or b'\0' in content[:8000]:
+                        skipped_files.append(file_path)
+                        continue
+                    
+                    scanned_files.append(file_path)
+                    findings = self.scanner.scan_text(
+                        content.decode('utf-8', errors='ignore'), source=file_path,
+                        errors=errors
+                    )
+                    for finding in findings:
+                        finding['file_path'] = file_path
+                        finding['blob_sha'] = blob_sha
+                    all_findings.extend(findings)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Error reading git objects: {e}")
+            errors.append({'error': str(e)})
+        
+        return {
+            'scan_type': 'diff',
+            'base_ref': base_ref,
+            'head_ref': head_ref,
+            'changed_files': len(changes),
+            'deleted_files': sum(1 for change in changes if change['status'] == 'D'),
+            'scanned_files': len(scanned_files),
+            'skipped_files': len(skipped_files),
+            'total_findings': len(all_findings),
+            'honeytokens_found': sum(1 for f in all_findings if f['is_honeytoken']),
+            'findings': all_findings,
+            'errors': errors,
+            'ci_environment': self.ci_environment
+        }
     
-    def generate_report(self, scan_result: Dict, format: str = 'text') -> str:
+    def scan_diff_hunks(self, base_ref: str = None, head_ref: str = None,
+                        context_lines: int = 2, repo_path: str = '.') -> Dict:
+        """Scan only the lines added between two refs.
+        
+        Each hunk is scanned together with `context_lines` of surrounding
+        context so multi-line secrets that straddle an edit are still matched,
+        but only findings touching an added line are reported. Line numbers
+        refer to the new version of the file.
+        """
+        import subprocess
+        from git_reader import iter_diff_hunks
+        
+        base_ref, head_ref = self._resolve_diff_refs(base_ref, head_ref)
+        
+        changed_files = set()
+        scanned_files = set()
+        added_lines = 0
+        all_findings = []
+        errors = []
+        
+        try:
+            for hunk in iter_diff_hunks(repo_path, base_ref, head_ref, context_lines):
+                path = hunk['path']
+                changed_files.add(path)
+                if not self.scanner.should_scan_path(path):
+                    continue
+                
+                added = sum(1 for _, is_added in hunk['lines'] if is_added)
+                if not added:
+                    continue
+                scanned_files.add(path)
+                added_lines += added
+                all_findings.extend(self.scanner.scan_hunk(hunk))
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Error running git diff: {e}")
+            errors.append({'error': str(e)})
+        
+        print(f"\n🔍 Scanned {added_lines} added line(s) in {len(scanned_files)} file(s)")
+        
+        return {
+            'scan_type': 'diff_hunks',
+            'base_ref': base_ref,
+            'head_ref': head_ref,
+            'context_lines': context_lines,
+            'changed_files': len(changed_files),
+            'scanned_files': len(scanned_files),
+            'added_lines': added_lines,
+            'total_findings': len(all_findings),
+            'honeytokens_found': sum(1 for f in all_findings if f['is_honeytoken']),
+            'findings': all_findings,
+            'errors': errors,
+            'ci_environment': self.ci_environment
+        }
+    
+    def scan_history(self, repo_path: str = '.', revs: List[str] = None) -> Dict:
+        """Scan every blob in the git history, attributing findings to commits.
+        
+        Each distinct blob is read once through a single `git cat-file --batch`
+        process and scanned once, however many commits or paths contain it.
+        Findings are attributed to the first commit that introduced the blob.
+        """
+        import subprocess
+        import threading
+        from git_reader import GitBlobReader, iter_history
+        
+        revs = revs or ['--all']
+        seen_blobs = set()
+        commits = set()
+        stats = {'blobs_scanned': 0, 'blobs_skipped': 0}
+        # new_blobs runs in the reader's feeder thread
+        stats_lock = threading.Lock()
+        all_findings = []
+        errors = []
+        
+        def new_blobs():
+            """Yield each blob the first time it appears in history."""
+            for change in iter_history(repo_path, revs):
+                commits.add(change['commit'])
+                if change['blob_sha'] in seen_blobs:
+                    continue
+                seen_blobs.add(change['blob_sha'])
+                if not self.scanner.should_scan_path(change['path']):
+                    with stats_lock:
+                        stats['blobs_skipped'] += 1
+                    continue
+                yield change['blob_sha'], change
+        
+        print(f"\n🔍 Scanning git history: {' '.join(revs)}")
+        
+        try:
+            with GitBlobReader(repo_path) as reader:
+                for (blob_sha, change), content in reader.iter_blobs(
+                        new_blobs(), max_size=self.scanner.MAX_FILE_SIZE):
+                    # Oversized and binary blobs are not scanned
+                    if content is None or b'\0' in content[:8000]:
+                        with stats_lock:
+                            stats['blobs_skipped'] += 1
+                        continue
+                    
+                    stats['blobs_scanned'] += 1
+                    findings = self.scanner.scan_text(
+                        content.decode('utf-8', errors='ignore'),
+                        source=f"{change['path']}@{change['commit'][:12]}",
+                        path=change['path'],
+                        errors=errors
+                    )
+                    for finding in findings:
+                        finding.update({
+                            'file_path': change['path'],
+                            'commit': change['commit'],
+                            'author': change['author'],
+                            'committed_at': change['committed_at'],
+                            'blob_sha': blob_sha
+                        })
+                    all_findings.extend(findings)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Error reading git history: {e}")
+            errors.append({'error': str(e)})
+        
+        return {
+            'scan_type': 'history',
+            'target': repo_path,
+            'revs': revs,
+            'commits_scanned': len(commits),
+            'unique_blobs': len(seen_blobs),
+            'total_files_scanned': stats['blobs_scanned'],
+            'blobs_skipped': stats['blobs_skipped'],
+            'total_findings': len(all_findings),
+            'honeytokens_found': sum(1 for f in all_findings if f['is_honeytoken']),
+            'findings': all_findings,
+            'errors': errors,
+            'ci_environment': self.ci_environment
+        }
+    
+    def generate_report(self, scan_result: Dict, format: str = 'text',
+                        max_findings: Optional[int] = None) -> str:
         """Generate a scan report in various formats."""
-        if format == 'text':
-            return self._generate_text_report(scan_result)
-        elif format == 'json':
-            return json.dumps(scan_result, indent=2)
+        buffer = io.StringIO()
+        self.write_report(scan_result, buffer, format=format, max_findings=max_findings)
+        return buffer.getvalue().rstrip('\n')
+    
+    def write_report(self, scan_result: Dict, stream: TextIO, format: str = 'text',
+                     max_findings: Optional[int] = None):
+        """Write a scan report to a stream as it is generated.
+        
+        Args:
+            scan_result: Scan result to report on
+            stream: Writable text stream (file, stdout, StringIO)
+            format: text, json, markdown, github or sarif
+            max_findings: Most findings listed individually, honeytokens
+                first; None uses the format's default, 0 lists all
+        """
+        if max_findings is None:
+            max_findings = DEFAULT_MAX_FINDINGS.get(format, 0)
+        
+        if format == 'json':
+            self._write_json_report(scan_result, stream)
+        elif format == 'sarif':
+            self._write_sarif_report(scan_result, stream)
         elif format == 'markdown':
-            return self._generate_markdown_report(scan_result)
+            self._write_markdown_report(scan_result, stream, max_findings)
         elif format == 'github':
-            return self._generate_github_annotations(scan_result)
+            self._write_github_annotations(scan_result, stream, max_findings)
         else:
-            return self._generate_text_report(scan_result)
+            self._write_text_report(scan_result, stream, max_findings)
+    
+    def _summarize_findings(self, findings: List[Dict]) -> Dict[str, List[int]]:
+        """Count findings and honeytokens per token type."""
+        summary = {}
+        for finding in findings:
+            counts = summary.setdefault(finding['token_type'], [0, 0])
+            counts[0] += 1
+            counts[1] += finding['is_honeytoken']
+        return dict(sorted(summary.items(), key=lambda item: -item[1][0]))
+    
+    def _limit_findings(self, findings: List[Dict], max_findings: int) -> Iterator[Dict]:
+        """Iterate over at most `max_findings` findings, honeytokens first."""
+        if not max_findings or len(findings) <= max_findings:
+            return iter(findings)
+        ordered = itertools.chain(
+            (f for f in findings if f['is_honeytoken']),
+            (f for f in findings if not f['is_honeytoken'])
+        )
+        return itertools.islice(ordered, max_findings)
+    
+    def _write_json_report(self, scan_result: Dict, stream: TextIO):
+        """Write the scan result as JSON, one finding per line."""
+        from token_scanner import Finding
+        
+        def default(obj):
+            return obj.to_dict() if isinstance(obj, Finding) else str(obj)
+        
+        stream.write('{')
+        for i, (key, value) in enumerate(scan_result.items()):
+            stream.write(f",\n  {json.dumps(key)}: " if i else f"\n  {json.dumps(key)}: ")
+            if key == 'findings' and value:
+                for j, finding in enumerate(value):
+                    stream.write(',\n    ' if j else '[\n    ')
+                    stream.write(json.dumps(finding, default=default))
+                stream.write('\n  ]')
+            else:
+                stream.write(json.dumps(value, indent=2, default=default).replace('\n', '\n  '))
+        stream.write('\n}\n')
     
-    def _generate_text_report(self, scan_result: Dict) -> str:
-        """Generate a text report."""
-        lines = [
+    def _fingerprint_key(self) -> bytes:
+        """Key for SARIF token fingerprints: the configured secret, else the repository."""
+        key = (os.getenv(FINGERPRINT_KEY_ENV)
+               or self.ci_environment['details'].get('repository')
+               or os.path.basename(os.path.abspath('.')))
+        return key.encode('utf-8')
+    
+    def _write_sarif_report(self, scan_result: Dict, stream: TextIO):
+        """Write a SARIF 2.1.0 log for code scanning upload, one result per line.
+        
+        Results carry a partial fingerprint that is an HMAC of the token
+        value under a repository-specific key (see FINGERPRINT_KEY_ENV),
+        never the value or a plain hash of it that could be checked against
+        guessed values, so the code scanning backend can match the same
+        secret across runs even when surrounding lines move.
+        """
+        key = self._fingerprint_key()
+        findings = scan_result.get('findings', [])
+        rule_ids = list(self.scanner.PATTERNS)
+        rule_ids += sorted({f['token_type'] for f in findings} - set(rule_ids))
+        rule_index = {rule_id: i for i, rule_id in enumerate(rule_ids)}
+        rules = [
+            {
+                'id': rule_id,
+                'name': rule_id.title().replace('_', ''),
+                'shortDescription': {'text': f"{rule_id.replace('_', ' ')} token"},
+                'defaultConfiguration': {'level': 'warning'}
+            }
+            for rule_id in rule_ids
+        ]
+        
+        stream.write('{\n  "$schema": "https://json.schemastore.org/sarif-2.1.0.json",\n'
+                     '  "version": "2.1.0",\n  "runs": [\n    {\n      "tool": ')
+        stream.write(json.dumps({'driver': {
+            'name': SARIF_TOOL_NAME,
+            'rules': rules
+        }}))
+        stream.write(',\n      "results": [')
+        
+        for i, finding in enumerate(findings):
+            token_hash = hmac.new(
+                key, f"{finding['token_type']}\0{finding['token_value']}".encode('utf-8'),
+                hashlib.sha256
+            ).hexdigest()
+            message = f"{finding['token_type']} detected"
+            if finding['is_honeytoken']:
+                message += " (HONEYTOKEN)"
+            
+            location = {'artifactLocation': {
+                'uri': _normalize_path(finding.get('file_path') or finding['source'])
+            }}
+            if finding.get('line_number'):
+                location['region'] = {'startLine': finding['line_number']}
+            
+            result = {
+                'ruleId': finding['token_type'],
+                'ruleIndex': rule_index[finding['token_type']],
+                'level': 'error' if finding['is_honeytoken'] else 'warning',
+                'message': {'text': message},
+                'locations': [{'physicalLocation': location}],
+                'partialFingerprints': {'tokenHash/v2': token_hash},
+                'properties': {'isHoneytoken': finding['is_honeytoken']}
+            }
+            if finding.get('commit'):
+                result['properties']['commit'] = finding['commit']
+            
+            stream.write(',\n        ' if i else '\n        ')
+            stream.write(json.dumps(result))
+        
+        stream.write('\n      ]\n    }\n  ]\n}\n' if findings else ']\n    }\n  ]\n}\n')
+    
+    def _write_text_report(self, scan_result: Dict, stream: TextIO, max_findings: int = 0):
+        """Write a text report."""
+        stream.write("\n".join([
             "\n" + "="*60,
             "HONEYTOKEN SCAN REPORT",
             "="*60,
@@ -213,33 +594,41 @@ class CIScanner:
             "",
             f"Files Scanned: {scan_result.get('total_files_scanned', scan_result.get('scanned_files', 0))}",
             f"Total Findings: {scan_result.get('total_findings', 0)}",
-            f"Honeytokens Found: {scan_result.get('honeytokens_found', 0)}",
-            ""
-        ]
+            f"Honeytokens Found: {scan_result.get('honeytokens_found', 0)}"
+        ]) + "\n")
+        if scan_result.get('suppressed_findings'):
+            stream.write(f"Suppressed by Baseline: {scan_result['suppressed_findings']}\n")
+        stream.write("\n")
         
         findings = scan_result.get('findings', [])
         if findings:
-            lines.append("FINDINGS:")
-            lines.append("-" * 60)
+            stream.write("FINDINGS BY TYPE:\n")
+            for token_type, (count, honeytokens) in self._summarize_findings(findings).items():
+                stream.write(f"   {token_type}: {count} ({honeytokens} honeytoken)\n")
+            stream.write("\n")
             
-            for i, finding in enumerate(findings, 1):
-                lines.extend([
+            stream.write("FINDINGS:\n")
+            stream.write("-" * 60 + "\n")
+            
+            for i, finding in enumerate(self._limit_findings(findings, max_findings), 1):
+                stream.write("\n".join([
                     f"\n{i}. {finding['token_type']}",
                     f"   Source: {finding['source']}",
                     f"   Line: {finding.get('line_number', 'N/A')}",
                     f"   Honeytoken: {'YES ⚠️' if finding['is_honeytoken'] else 'No'}",
                     f"   Preview: {finding['token_preview']}"
-                ])
+                ]) + "\n")
+            
+            if max_findings and len(findings) > max_findings:
+                stream.write(f"\n... and {len(findings) - max_findings} more finding(s) not shown\n")
         else:
-            lines.append("✓ No tokens found")
+            stream.write("✓ No tokens found\n")
         
-        lines.append("\n" + "="*60)
-        
-        return "\n".join(lines)
+        stream.write("\n" + "="*60 + "\n")
     
-    def _generate_markdown_report(self, scan_result: Dict) -> str:
-        """Generate a markdown report."""
-        lines = [
+    def _write_markdown_report(self, scan_result: Dict, stream: TextIO, max_findings: int = 0):
+        """Write a markdown report."""
+        stream.write("\n".join([
             "# 🔍 Honeytoken Scan Report",
             "",
             f"**Platform:** {scan_result.get('ci_environment', {}).get('platform', 'unknown')}  ",
@@ -250,53 +639,63 @@ class CIScanner:
             "",
             f"- **Files Scanned:** {scan_result.get('total_files_scanned', scan_result.get('scanned_files', 0))}",
             f"- **Total Findings:** {scan_result.get('total_findings', 0)}",
-            f"- **Honeytokens Found:** {scan_result.get('honeytokens_found', 0)}",
-            ""
-        ]
+            f"- **Honeytokens Found:** {scan_result.get('honeytokens_found', 0)}"
+        ]) + "\n")
+        if scan_result.get('suppressed_findings'):
+            stream.write(f"- **Suppressed by Baseline:** {scan_result['suppressed_findings']}\n")
+        stream.write("\n")
         
         findings = scan_result.get('findings', [])
         if findings:
-            lines.extend([
+            stream.write("## Findings by Type\n\n")
+            stream.write("| Type | Findings | Honeytokens |\n")
+            stream.write("|------|----------|-------------|\n")
+            for token_type, (count, honeytokens) in self._summarize_findings(findings).items():
+                stream.write(f"| {token_type} | {count} | {honeytokens} |\n")
+            stream.write("\n")
+            
+            stream.write("\n".join([
                 "## 🚨 Findings",
                 "",
                 "| # | Type | Source | Line | Honeytoken | Preview |",
                 "|---|------|--------|------|------------|---------|"
-            ])
+            ]) + "\n")
             
-            for i, finding in enumerate(findings, 1):
+            for i, finding in enumerate(self._limit_findings(findings, max_findings), 1):
                 honeytoken_marker = "⚠️ YES" if finding['is_honeytoken'] else "No"
-                lines.append(
+                stream.write(
                     f"| {i} | {finding['token_type']} | `{finding['source']}` | "
                     f"{finding.get('line_number', 'N/A')} | {honeytoken_marker} | "
-                    f"`{finding['token_preview']}` |"
+                    f"`{finding['token_preview']}` |\n"
                 )
+            
+            if max_findings and len(findings) > max_findings:
+                stream.write(f"\n_{len(findings) - max_findings} more finding(s) not shown._\n")
         else:
-            lines.extend([
+            stream.write("\n".join([
                 "## ✅ Results",
                 "",
                 "No tokens found in the scan."
-            ])
-        
-        return "\n".join(lines)
+            ]) + "\n")
     
-    def _generate_github_annotations(self, scan_result: Dict) -> str:
-        """Generate GitHub Actions annotations."""
-        annotations = []
+    def _write_github_annotations(self, scan_result: Dict, stream: TextIO, max_findings: int = 0):
+        """Write GitHub Actions annotations."""
+        findings = scan_result.get('findings', [])
         
-        for finding in scan_result.get('findings', []):
+        for finding in self._limit_findings(findings, max_findings):
             level = 'error' if finding['is_honeytoken'] else 'warning'
-            file_path = finding['source']
-            line = finding.get('line_number', 1)
+            file_path = finding.get('file_path') or finding['source']
+            line = finding.get('line_number') or 1
             
             message = f"{finding['token_type']} detected"
             if finding['is_honeytoken']:
                 message += " (HONEYTOKEN)"
             
-            annotations.append(
-                f"::{level} file={file_path},line={line}::{message}"
-            )
+            stream.write(f"::{level} file={file_path},line={line}::{message}\n")
         
-        return "\n".join(annotations)
+        if max_findings and len(findings) > max_findings:
+            stream.write(f"::notice::{len(findings) - max_findings} more finding(s) "
+                         f"not annotated, see the full report\n")
     
     def set_ci_output(self, scan_result: Dict):
         """Set CI outputs for use in subsequent steps."""
@@ -316,6 +715,60 @@ class CIScanner:
         os.environ['SCAN_FINDINGS_COUNT'] = str(findings_count)
         os.environ['SCAN_HONEYTOKENS_FOUND'] = str(honeytokens_count)
     
+    def load_baseline(self, baseline_file: str = DEFAULT_BASELINE_FILE) -> Set[str]:
+        """Load the fingerprints of known findings from a baseline file."""
+        if not os.path.exists(baseline_file):
+            return set()
+        
+        try:
+            with open(baseline_file, 'r') as f:
+                return set(json.load(f).get('findings', {}))
+        except (json.JSONDecodeError, AttributeError) as e:
+            print(f"Error loading baseline {baseline_file}: {e}")
+            return set()
+    
+    def save_baseline(self, scan_result: Dict, baseline_file: str = DEFAULT_BASELINE_FILE) -> int:
+        """Record the current non-honeytoken findings as known.
+        
+        Only fingerprints, token types and paths are stored, never token values.
+        
+        Returns:
+            Number of fingerprints written
+        """
+        findings = {
+            finding_fingerprint(f): {
+                'token_type': f['token_type'],
+                'file_path': _normalize_path(f.get('file_path') or f['source'])
+            }
+            for f in scan_result.get('findings', []) if not f['is_honeytoken']
+        }
+        
+        with open(baseline_file, 'w') as f:
+            json.dump({
+                'version': 1,
+                'generated_at': datetime.utcnow().isoformat(),
+                'findings': dict(sorted(findings.items()))
+            }, f, indent=2)
+        
+        return len(findings)
+    
+    def apply_baseline(self, scan_result: Dict, fingerprints: Set[str]) -> Dict:
+        """Drop findings already in the baseline from a scan result.
+        
+        Honeytoken findings are never suppressed.
+        """
+        findings = scan_result.get('findings', [])
+        kept = [
+            f for f in findings
+            if f['is_honeytoken'] or finding_fingerprint(f) not in fingerprints
+        ]
+        
+        scan_result['findings'] = kept
+        scan_result['suppressed_findings'] = len(findings) - len(kept)
+        scan_result['total_findings'] = len(kept)
+        scan_result['honeytokens_found'] = sum(1 for f in kept if f['is_honeytoken'])
+        return scan_result
+    
     def should_fail_build(self, scan_result: Dict, 
                          fail_on_findings: bool = True,
                          fail_on_honeytokens: bool = True) -> bool:
@@ -343,48 +796,125 @@ def main():
                        help='Scan entire workspace')
     parser.add_argument('--scan-diff', action='store_true',
                        help='Scan only changed files')
+    parser.add_argument('--hunks', action='store_true',
+                       help='With --scan-diff, scan only added lines')
+    parser.add_argument('--context-lines', type=int, default=2,
+                       help='Context lines scanned around each hunk (default: 2)')
+    parser.add_argument('--scan-history', action='store_true',
+                       help='Scan every blob in the git history')
+    parser.add_argument('--revs', nargs='+',
+                       help='Revisions for history scan (default: --all)')
+    parser.add_argument('--merge-results', nargs='+', metavar='RESULT_FILE',
+                       help='Combine JSON results of sharded scans into one report')
+    parser.add_argument('--shard-index', type=int,
+                       help='With --scan-workspace, scan only this shard (0-based)')
+    parser.add_argument('--shard-count', type=int,
+                       help='Number of shards the workspace is split into')
     parser.add_argument('--base-ref', help='Base reference for diff')
     parser.add_argument('--head-ref', help='Head reference for diff')
-    parser.add_argument('--format', choices=['text', 'json', 'markdown', 'github'],
+    parser.add_argument('--format', choices=['text', 'json', 'markdown', 'github', 'sarif'],
                        default='text', help='Report format')
     parser.add_argument('--fail-on-findings', action='store_true',
                        help='Exit with error if findings detected')
     parser.add_argument('--fail-on-honeytokens', action='store_true',
                        help='Exit with error if honeytokens detected')
     parser.add_argument('--output-file', help='Write report to file')
+    parser.add_argument('--rules', action='append', default=[],
+                       help='Rule pack (TOML/YAML) adding token rules (repeatable)')
+    parser.add_argument('--sarif-file',
+                       help='Also write a SARIF report for code scanning upload')
+    parser.add_argument('--max-findings', type=int,
+                       help='Findings listed individually in the report '
+                            '(default: 100 for markdown, 50 for github, 0 for all)')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE_FILE,
+                       help=f'Suppress findings listed in a baseline file '
+                            f'(default: {DEFAULT_BASELINE_FILE})')
+    parser.add_argument('--update-baseline', action='store_true',
+                       help='Record current findings in the baseline file')
+    parser.add_argument('--file-budget', type=float,
+                       help='Seconds allowed for matching one file; overruns are reported as errors')
+    parser.add_argument('--rule-budget', type=float,
+                       help='Seconds allowed for one pattern on one file')
+    parser.add_argument('--verify-checksums', action='store_true',
+                       help='Drop GitHub tokens whose built-in checksum does not match')
+    parser.add_argument('--honeytokens-only', action='store_true',
+                       help='Only look for registered honeytoken values (canary sweep)')
+    parser.add_argument('--archives', action='store_true',
+                       help='Also scan inside zip, jar, whl, tar and compressed files')
     
     args = parser.parse_args()
     
-    ci_scanner = CIScanner()
+    shard = None
+    if args.shard_count is not None or args.shard_index is not None:
+        if args.shard_count is None or args.shard_index is None:
+            parser.error('--shard-index and --shard-count must be given together')
+        if not 0 <= args.shard_index < args.shard_count:
+            parser.error('--shard-index must be between 0 and --shard-count - 1')
+        if args.scan_diff or args.scan_history or args.merge_results:
+            parser.error('--shard-index/--shard-count only apply to workspace scans')
+        if args.update_baseline:
+            parser.error('--update-baseline would record only this shard\'s findings; '
+                         'update it from the --merge-results job instead')
+        shard = (args.shard_index, args.shard_count)
+    
+    try:
+        ci_scanner = CIScanner(rule_packs=args.rules, file_time_budget=args.file_budget,
+                               rule_time_budget=args.rule_budget,
+                               validate_checksums=args.verify_checksums,
+                               honeytokens_only=args.honeytokens_only,
+                               scan_archives=args.archives)
+    except (OSError, ValueError) as e:
+        print(f"Error loading rule pack: {e}")
+        sys.exit(2)
     
     print(f"\n🔍 CI Scanner")
     print(f"   Platform: {ci_scanner.ci_environment['platform']}")
     print(f"   Is CI: {ci_scanner.ci_environment['is_ci']}")
     
     # Perform scan
-    if args.scan_diff:
+    if args.merge_results:
+        try:
+            scan_result = ci_scanner.merge_results(args.merge_results)
+        except ValueError as e:
+            print(f"Error merging results: {e}")
+            sys.exit(2)
+        print(f"\n✓ Merged {len(args.merge_results)} result file(s)")
+    elif args.scan_history:
+        scan_result = ci_scanner.scan_history(revs=args.revs)
+    elif args.scan_diff and args.hunks:
+        scan_result = ci_scanner.scan_diff_hunks(args.base_ref, args.head_ref,
+                                                 context_lines=args.context_lines)
+    elif args.scan_diff:
         scan_result = ci_scanner.scan_diff(args.base_ref, args.head_ref)
     else:
-        scan_result = ci_scanner.scan_workspace()
+        scan_result = ci_scanner.scan_workspace(shard=shard)
     
-    # Generate report
-    report = ci_scanner.generate_report(scan_result, format=args.format)
+    # Suppress known findings
+    if args.baseline or args.update_baseline:
+        baseline_file = args.baseline or DEFAULT_BASELINE_FILE
+        if args.update_baseline:
+            count = ci_scanner.save_baseline(scan_result, baseline_file)
+            print(f"\n✓ Baseline updated: {count} finding(s) in {baseline_file}")
+        ci_scanner.apply_baseline(scan_result, ci_scanner.load_baseline(baseline_file))
     
-    # Output report
+    # Write report
     if args.output_file:
         with open(args.output_file, 'w', encoding='utf-8') as f:
-            f.write(report)
+            ci_scanner.write_report(scan_result, f, format=args.format,
+                                    max_findings=args.max_findings)
         print(f"\n✓ Report saved to: {args.output_file}")
     else:
-        print(report)
+        ci_scanner.write_report(scan_result, sys.stdout, format=args.format,
+                                max_findings=args.max_findings)
+    
+    if args.sarif_file:
+        with open(args.sarif_file, 'w', encoding='utf-8') as f:
+            ci_scanner.write_report(scan_result, f, format='sarif')
+        print(f"✓ SARIF report saved to: {args.sarif_file}")
     
     # Set CI outputs
     ci_scanner.set_ci_output(scan_result)
     
-    # GitHub annotations
-    if args.format == 'github':
-        print(report)
-    
     # Determine if build should fail
     should_fail = ci_scanner.should_fail_build(
         scan_result,
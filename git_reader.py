@@ -0,0 +1,254 @@
+"""
+Git Reader Module
+Streams git history and object contents through long-lived git processes.
+"""
+
+import queue
+import subprocess
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+class GitBlobReader:
+    """Read objects through a single `git cat-file --batch` process."""
+    
+    def __init__(self, repo_path: str = '.'):
+        """Start the batch process for a repository."""
+        self.repo_path = repo_path
+        self.process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            cwd=repo_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Stop the batch process, even if responses were left unread."""
+        # Closing stdout first makes a process blocked on a full pipe exit,
+        # which in turn unblocks a feeder thread still writing requests
+        for stream in (self.process.stdout, self.process.stdin):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+    
+    def _read_object(self, max_size: int = None) -> Tuple[Optional[str], Optional[bytes]]:
+        """Read one response from the batch process.
+        
+        Returns:
+            Tuple of (object type, content); content is None for missing
+            objects and for objects larger than `max_size`
+        """
+        header = self.process.stdout.readline().decode('utf-8', errors='replace').split()
+        if len(header) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            return None, None
+        
+        object_type, size = header[1], int(header[2])
+        if max_size is not None and size > max_size:
+            # The content is sent regardless, so drain it in chunks
+            remaining = size + 1
+            while remaining:
+                remaining -= len(self.process.stdout.read(min(remaining, 1 << 20)))
+            return object_type, None
+        
+        content = self.process.stdout.read(size)
+        self.process.stdout.read(1)
+        return object_type, content
+    
+    def read(self, object_name: str, max_size: int = None) -> Optional[bytes]:
+        """Read a single object (blob SHA or `<rev>:<path>`)."""
+        self.process.stdin.write(object_name.encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        return self._read_object(max_size)[1]
+    
+    def iter_blobs(self, items: Iterable[Tuple], max_size: int = None) -> Iterator[Tuple[Tuple, Optional[bytes]]]:
+        """Read many objects, pipelining requests ahead of responses.
+        
+        Args:
+            items: Tuples whose first element is the object name; any other
+                elements are passed through untouched
+            max_size: Content of larger objects is skipped (returned as None)
+        
+        Yields:
+            (item, content) in the order the items were given
+        """
+        pending = queue.Queue(maxsize=256)
+        done = object()
+        errors = []
+        
+        def feed():
+            """Write object names while the caller consumes responses."""
+            try:
+                for item in items:
+                    pending.put(item)
+                    self.process.stdin.write(item[0].encode('utf-8') + b'\n')
+                    self.process.stdin.flush()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                pending.put(done)
+        
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        
+        while True:
+            item = pending.get()
+            if item is done:
+                break
+            yield item, self._read_object(max_size)[1]
+        
+        writer.join()
+        if errors:
+            raise errors[0]
+
+
+def _unquote_path(path: str) -> str:
+    """Undo git's C-style quoting of unusual paths."""
+    if not (path.startswith('"') and path.endswith('"')):
+        return path
+    raw = path[1:-1].encode('latin-1', errors='backslashreplace').decode('unicode_escape')
+    return raw.encode('latin-1', errors='ignore').decode('utf-8', errors='replace')
+
+
+def iter_history(repo_path: str = '.', revs: Iterable[str] = ('--all',),
+                 reverse: bool = True) -> Iterator[Dict]:
+    """Stream blobs added or modified by each commit via `git log --raw`.
+    
+    With `reverse` the oldest commits come first, so the first time a blob
+    appears is the commit that introduced it. Merge commits are diffed
+    against each parent (`-m`), so content that only exists in a merge
+    result (conflict resolutions, evil merges) is listed too; the same blob
+    may then appear more than once and callers deduplicate by blob_sha.
+    
+    Yields:
+        Dicts with commit, author, committed_at, path and blob_sha
+    """
+    command = ['git', '-c', 'core.quotePath=false', 'log', '--raw', '-m', '--no-abbrev',
+               '--no-renames', '--format=%x00%H%x09%an%x09%cI']
+    if reverse:
+        command.append('--reverse')
+    command.extend(revs)
+    command.append('--')
+    
+    process = subprocess.Popen(command, cwd=repo_path, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    commit = {}
+    try:
+        for raw_line in process.stdout:
+            line = raw_line.decode('utf-8', errors='replace').rstrip('\n')
+            if line.startswith('\0'):
+                sha, author, committed_at = line[1:].split('\t', 2)
+                commit = {'commit': sha, 'author': author, 'committed_at': committed_at}
+            elif line.startswith(':'):
+                # :<old mode> <new mode> <old sha> <new sha> <status>\t<path>
+                meta, _, path = line.partition('\t')
+                fields = meta.split()
+                if len(fields) < 5 or fields[4].startswith('D') or fields[1] == '160000':
+                    continue
+                yield dict(commit, path=_unquote_path(path), blob_sha=fields[3])
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode('utf-8', errors='replace')
+        process.stderr.close()
+        if process.wait() not in (0, -13):
+            raise subprocess.CalledProcessError(process.returncode, command, stderr=stderr)
+
+
+def iter_diff_hunks(repo_path: str = '.', base_ref: str = 'HEAD^', head_ref: str = 'HEAD',
+                    context_lines: int = 2, cached: bool = False) -> Iterator[Dict]:
+    """Stream the hunks of `git diff base_ref head_ref` in their new-file form.
+    
+    With `cached` the staged changes (`git diff --cached`) are read instead
+    and the refs are ignored.
+    
+    Yields:
+        Dicts with path, start_line (new-file line of the first line) and
+        lines, a list of (text, is_added) covering context and added lines
+    """
+    command = ['git', '-c', 'core.quotePath=false', 'diff', f'-U{context_lines}',
+               '--no-color', '--no-ext-diff', '--diff-filter=ACMR', '-M']
+    command.extend(['--cached'] if cached else [base_ref, head_ref])
+    command.append('--')
+    
+    process = subprocess.Popen(command, cwd=repo_path, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    path = None
+    hunk = None
+    try:
+        for raw_line in process.stdout:
+            line = raw_line.decode('utf-8', errors='replace').rstrip('\n')
+            
+            if hunk is not None and line[:1] in (' ', '+', '-', '\\'):
+                if line.startswith('+'):
+                    hunk['lines'].append((line[1:], True))
+                elif line.startswith(' '):
+                    hunk['lines'].append((line[1:], False))
+                # Removed lines and "\ No newline" markers are not in the new file
+                continue
+            
+            if hunk is not None:
+                yield hunk
+                hunk = None
+            
+            if line.startswith('diff --git '):
+                path = None
+            elif line.startswith('+++ '):
+                # Git ends the header with a tab when the path contains a space
+                target = line[4:].rstrip('\t')
+                path = None if target == '/dev/null' else _unquote_path(target)[2:]
+            elif line.startswith('@@ ') and path is not None:
+                # @@ -<old start>[,<count>] +<new start>[,<count>] @@
+                new_range = line.split(' ')[2]
+                hunk = {'path': path, 'start_line': int(new_range[1:].split(',')[0]),
+                        'lines': []}
+        
+        if hunk is not None:
+            yield hunk
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode('utf-8', errors='replace')
+        process.stderr.close()
+        if process.wait() not in (0, -13):
+            raise subprocess.CalledProcessError(process.returncode, command, stderr=stderr)
+
+
+def iter_diff_blobs(repo_path: str = '.', base_ref: str = 'HEAD^',
+                    head_ref: str = 'HEAD') -> Iterator[Dict]:
+    """Stream the files changed between two refs via `git diff --raw`.
+    
+    Renamed and copied files are reported under their new path. Submodule
+    entries are left out.
+    
+    Yields:
+        Dicts with path, status (A, C, D, M, R or T) and blob_sha, the head
+        blob (None for deleted files)
+    """
+    command = ['git', '-c', 'core.quotePath=false', 'diff', '--raw', '--no-abbrev',
+               '-M', base_ref, head_ref, '--']
+    result = subprocess.run(command, cwd=repo_path, capture_output=True, check=True)
+    
+    for raw_line in result.stdout.decode('utf-8', errors='replace').splitlines():
+        # :<old mode> <new mode> <old sha> <new sha> <status>\t<path>[\t<new path>]
+        meta, _, paths = raw_line.partition('\t')
+        fields = meta.split()
+        if len(fields) < 5 or '160000' in fields[:2]:
+            continue
+        status = fields[4][0]
+        yield {
+            'path': _unquote_path(paths.split('\t')[-1]),
+            'status': status,
+            'blob_sha': None if status == 'D' else fields[3]
+        }
@@ -5,32 +5,292 @@ Handles GitHub API interactions for repository management and scanning.
 
 import os
 import json
-import requests
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import List, Dict, Optional
 from datetime import datetime
+from urllib.parse import parse_qs, urlparse
 import base64
 
+from rate_limiter import RequestScheduler
+
+
+class GitHubAPIError(Exception):
+    """Raised when a GitHub API request fails."""
+    
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ETagCache:
+    """On-disk cache of GET responses revalidated with If-None-Match.
+    
+    GitHub does not count 304 Not Modified responses against the rate limit,
+    so revalidating a cached response is close to free.
+    """
+    
+    def __init__(self, cache_dir: str = '.github_cache'):
+        """Initialize cache directory."""
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def _path(self, key: str) -> str:
+        """Get the file holding a cache entry."""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f'{digest}.json')
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a cached entry."""
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def put(self, key: str, response):
+        """Store a response that carries an ETag."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'etag': response.headers['ETag'],
+            'headers': {name: response.headers[name] for name in ('Content-Type', 'Link')
+                        if name in response.headers},
+            'body': response.content.decode('utf-8')
+        }
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+
+
+class BlobCache:
+    """Persistent cache of scan matches keyed by git blob SHA.
+    
+    A blob SHA identifies file content, so a blob scanned once never needs to
+    be downloaded or scanned again, whichever path or repository it appears
+    under. The cache is invalidated when the scanner's patterns, rules or
+    matching options change (see TokenScanner.rules_fingerprint).
+    """
+    
+    def __init__(self, cache_file: str = 'blob_cache.json', scanner=None):
+        """Initialize cache, loading entries made with the same patterns."""
+        self.cache_file = cache_file
+        self.patterns_hash = scanner.rules_fingerprint if scanner else None
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.blobs = self._load()
+    
+    def _load(self) -> Dict:
+        """Load cached blobs from disk."""
+        if self.cache_file and os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    data = json.load(f)
+                if data.get('patterns_hash') == self.patterns_hash:
+                    return data.get('blobs', {})
+            except json.JSONDecodeError:
+                pass
+        return {}
+    
+    def save(self):
+        """Save cached blobs to disk if anything changed."""
+        with self.lock:
+            if not self.dirty or not self.cache_file:
+                return
+            with open(self.cache_file, 'w') as f:
+                json.dump({'patterns_hash': self.patterns_hash, 'blobs': self.blobs}, f)
+            self.dirty = False
+    
+    def get(self, sha: str) -> Optional[List]:
+        """Get cached matches for a blob, or None if it was never scanned."""
+        return self.blobs.get(sha)
+    
+    def put(self, sha: str, findings: List[Dict]):
+        """Store the matches found in a blob."""
+        with self.lock:
+            self.blobs[sha] = [
+                [f['token_type'], f['token_value'], f['position'], f['line_number']]
+                for f in findings
+            ]
+            self.dirty = True
+    
+    def __contains__(self, sha: str) -> bool:
+        return sha in self.blobs
+    
+    def __len__(self) -> int:
+        return len(self.blobs)
+
 
 class GitHubIntegration:
     """GitHub API integration for token management and scanning."""
     
-    def __init__(self, token: str = None):
-        """Initialize with GitHub API token."""
+    def __init__(self, token: str = None, base_url: str = None,
+                 max_workers: int = 8, cache_dir: str = None,
+                 requests_per_second: float = 15, max_retries: int = 3,
+                 max_backoff: float = 900):
+        """Initialize with GitHub API token.
+        
+        Args:
+            token: GitHub API token (defaults to GITHUB_TOKEN)
+            base_url: API root, e.g. for GitHub Enterprise or a local mock
+            max_workers: Concurrent requests during repository scans
+            cache_dir: Directory for the ETag response cache (disabled if None)
+            requests_per_second: Pacing rate shared by all requests (GitHub's
+                secondary limit allows about 900 GETs per minute)
+            max_retries: Retries after rate-limit or server errors
+            max_backoff: Longest wait before a retry, in seconds
+        """
         self.token = token or os.getenv('GITHUB_TOKEN')
         if not self.token:
             raise ValueError("GitHub token required. Set GITHUB_TOKEN env var.")
         
-        self.base_url = 'https://api.github.com'
+        self.base_url = (base_url or os.getenv('GITHUB_API_URL') or
+                         'https://api.github.com').rstrip('/')
         self.headers = {
             'Authorization': f'token {self.token}',
             'Accept': 'application/vnd.github.v3+json'
         }
+        self.max_workers = max_workers
+        
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        # Pooled session so concurrent requests reuse keep-alive connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Latest rate-limit state reported by the API
+        self.rate_limit = {'limit': None, 'remaining': None, 'reset': None}
+        self.scheduler = RequestScheduler(rate=requests_per_second,
+                                          capacity=requests_per_second * 2)
+        self.etag_cache = ETagCache(cache_dir) if cache_dir else None
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0}
+        self.stats_lock = threading.Lock()
+    
+    def _record_rate_limit(self, response):
+        """Track X-RateLimit-* headers from a response."""
+        headers = response.headers
+        if 'X-RateLimit-Remaining' in headers:
+            try:
+                self.rate_limit = {
+                    'limit': int(headers.get('X-RateLimit-Limit', 0)),
+                    'remaining': int(headers['X-RateLimit-Remaining']),
+                    'reset': int(headers.get('X-RateLimit-Reset', 0))
+                }
+            except ValueError:
+                pass
+    
+    def _count(self, stat: str):
+        """Increment a request statistic."""
+        with self.stats_lock:
+            self.stats[stat] += 1
+    
+    def _backoff_delay(self, response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a response, or None if it should not be retried."""
+        status = response.status_code
+        headers = response.headers
+        
+        if status in (403, 429):
+            if 'Retry-After' in headers:
+                # Secondary rate limit
+                try:
+                    return min(float(headers['Retry-After']), self.max_backoff)
+                except ValueError:
+                    pass
+            if headers.get('X-RateLimit-Remaining') == '0':
+                # Primary rate limit exhausted until the reset time
+                reset = int(headers.get('X-RateLimit-Reset', 0))
+                return min(max(reset - time.time(), 0) + 1, self.max_backoff)
+            if 'rate limit' in response.text.lower():
+                return min(60 * 2 ** attempt, self.max_backoff)
+            return None
+        
+        if status in (502, 503, 504):
+            return min(2 ** attempt, self.max_backoff)
+        
+        return None
+    
+    def _cached_response(self, entry: Dict, url: str):
+        """Rebuild a response object from a cache entry."""
+        import requests
+        
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = entry['body'].encode('utf-8')
+        response.headers.update(entry['headers'])
+        response.headers['ETag'] = entry['etag']
+        response.from_cache = True
+        return response
+    
+    def _request(self, method: str, url: str, params: Dict = None,
+                 json_data: Dict = None, use_cache: bool = True):
+        """Send an API request through the shared pacing, caching and retry layer.
+        
+        Raises:
+            GitHubAPIError: If the request fails or returns an error status
+        """
+        import requests
+        
+        headers = dict(self.headers)
+        cache_key = None
+        entry = None
+        if method == 'GET' and use_cache and self.etag_cache is not None:
+            query = '&'.join(f'{k}={v}' for k, v in sorted((params or {}).items()))
+            token_hash = hashlib.sha256(self.token.encode('utf-8')).hexdigest()[:16]
+            cache_key = f'{token_hash} {url}?{query}'
+            entry = self.etag_cache.get(cache_key)
+            if entry:
+                headers['If-None-Match'] = entry['etag']
+        
+        for attempt in range(self.max_retries + 1):
+            self.scheduler.acquire()
+            try:
+                response = self.session.request(method, url, headers=headers,
+                                                params=params, json=json_data)
+            except requests.exceptions.RequestException as e:
+                raise GitHubAPIError(str(e)) from e
+            self._count('requests')
+            self._record_rate_limit(response)
+            
+            if response.status_code == 304 and entry:
+                self._count('not_modified')
+                return self._cached_response(entry, url)
+            
+            delay = self._backoff_delay(response, attempt)
+            if delay is None or attempt == self.max_retries:
+                break
+            
+            # Every worker waits, not just this one
+            self._count('retries')
+            self.scheduler.pause(delay)
+        
+        if response.status_code >= 400:
+            try:
+                message = response.json().get('message', response.reason)
+            except ValueError:
+                message = response.reason
+            raise GitHubAPIError(f"{response.status_code} {message} for url: {url}",
+                                 status_code=response.status_code)
+        
+        if cache_key and 'ETag' in response.headers:
+            self.etag_cache.put(cache_key, response)
+        
+        return response
     
     def test_connection(self) -> Dict:
         """Test GitHub API connection."""
         try:
-            response = requests.get(f'{self.base_url}/user', headers=self.headers)
-            response.raise_for_status()
+            response = self._request('GET', f'{self.base_url}/user')
             user_data = response.json()
             return {
                 'success': True,
@@ -38,11 +298,19 @@ class GitHubIntegration:
                 'name': user_data.get('name'),
                 'type': user_data.get('type')
             }
-        except requests.exceptions.RequestException as e:
+        except GitHubAPIError as e:
             return {'success': False, 'error': str(e)}
     
-    def list_repositories(self, user: str = None, org: str = None) -> List[Dict]:
-        """List repositories for a user or organization."""
+    def list_repositories(self, user: str = None, org: str = None,
+                          per_page: int = 100, raise_errors: bool = False) -> List[Dict]:
+        """List repositories for a user or organization.
+        
+        Failures are printed and give an empty list, unless `raise_errors`
+        is set for callers that must tell "no repositories" from "no answer".
+        
+        Raises:
+            GitHubAPIError: If `raise_errors` is set and a page can't be fetched
+        """
         if org:
             url = f'{self.base_url}/orgs/{org}/repos'
         elif user:
@@ -50,35 +318,55 @@ class GitHubIntegration:
         else:
             url = f'{self.base_url}/user/repos'
         
+        def fetch_page(page: int):
+            """Fetch one page of repositories."""
+            return self._request('GET', url, params={'page': page, 'per_page': per_page})
+        
+        def summarize(page_repos: List[Dict]) -> List[Dict]:
+            """Keep the fields callers need."""
+            return [{
+                'name': repo['name'],
+                'full_name': repo['full_name'],
+                'private': repo['private'],
+                'html_url': repo['html_url'],
+                'default_branch': repo['default_branch'],
+                'fork': repo.get('fork', False),
+                'archived': repo.get('archived', False)
+            } for repo in page_repos]
+        
         try:
-            repos = []
-            page = 1
-            while True:
-                response = requests.get(
-                    url,
-                    headers=self.headers,
-                    params={'page': page, 'per_page': 100}
+            first = fetch_page(1)
+            repos = summarize(first.json())
+            
+            # The Link header names the last page, so the rest can be fetched in parallel
+            last_url = first.links.get('last', {}).get('url')
+            if last_url:
+                last_page = int(parse_qs(urlparse(last_url).query)['page'][0])
+                pages = {}
+                errors = []
+                self._fetch_bounded(
+                    range(2, last_page + 1), fetch_page,
+                    lambda page, response: pages.__setitem__(page, response.json()),
+                    errors
                 )
-                response.raise_for_status()
-                page_repos = response.json()
-                
-                if not page_repos:
-                    break
-                
-                repos.extend([{
-                    'name': repo['name'],
-                    'full_name': repo['full_name'],
-                    'private': repo['private'],
-                    'html_url': repo['html_url'],
-                    'default_branch': repo['default_branch']
-                } for repo in page_repos])
-                
-                page += 1
-                if len(page_repos) < 100:
-                    break
+                if errors:
+                    raise GitHubAPIError(errors[0]['error'])
+                for page in sorted(pages):
+                    repos.extend(summarize(pages[page]))
+            else:
+                # No Link header: page serially until a short page
+                page = 1
+                page_size = len(repos)
+                while page_size == per_page:
+                    page += 1
+                    page_repos = fetch_page(page).json()
+                    repos.extend(summarize(page_repos))
+                    page_size = len(page_repos)
             
             return repos
-        except requests.exceptions.RequestException as e:
+        except GitHubAPIError as e:
+            if raise_errors:
+                raise
             print(f"Error listing repositories: {e}")
             return []
     
@@ -91,10 +379,9 @@ class GitHubIntegration:
             params['ref'] = branch
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
+            response = self._request('GET', url, params=params)
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except GitHubAPIError as e:
             print(f"Error getting repository contents: {e}")
             return []
     
@@ -107,8 +394,7 @@ class GitHubIntegration:
             params['ref'] = branch
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
+            response = self._request('GET', url, params=params)
             content_data = response.json()
             
             if content_data.get('encoding') == 'base64':
@@ -116,46 +402,90 @@ class GitHubIntegration:
                 return content
             
             return None
-        except requests.exceptions.RequestException as e:
+        except GitHubAPIError as e:
             print(f"Error getting file content: {e}")
             return None
     
+    def get_repository(self, owner: str, repo: str) -> Optional[Dict]:
+        """Get repository metadata."""
+        url = f'{self.base_url}/repos/{owner}/{repo}'
+        
+        try:
+            response = self._request('GET', url)
+            return response.json()
+        except GitHubAPIError as e:
+            print(f"Error getting repository: {e}")
+            return None
+    
+    def get_repository_tree(self, owner: str, repo: str,
+                            branch: str = None) -> Optional[Dict]:
+        """Get the full recursive git tree of a branch in one request."""
+        if branch is None:
+            repo_data = self.get_repository(owner, repo)
+            if repo_data is None:
+                return None
+            branch = repo_data.get('default_branch', 'main')
+        
+        url = f'{self.base_url}/repos/{owner}/{repo}/git/trees/{branch}'
+        
+        try:
+            response = self._request('GET', url, params={'recursive': '1'})
+            return response.json()
+        except GitHubAPIError as e:
+            print(f"Error getting repository tree: {e}")
+            return None
+    
+    def get_blob_content(self, owner: str, repo: str, sha: str) -> Optional[str]:
+        """Get content of a git blob by SHA."""
+        url = f'{self.base_url}/repos/{owner}/{repo}/git/blobs/{sha}'
+        
+        try:
+            # Blobs are immutable and covered by BlobCache, so skip the ETag cache
+            response = self._request('GET', url, use_cache=False)
+            blob_data = response.json()
+            
+            if blob_data.get('encoding') == 'base64':
+                return base64.b64decode(blob_data['content']).decode('utf-8', errors='ignore')
+            
+            return None
+        except GitHubAPIError as e:
+            print(f"Error getting blob content: {e}")
+            return None
+    
     def scan_repository_for_tokens(self, owner: str, repo: str, 
-                                   scanner) -> Dict:
-        """Scan a GitHub repository for tokens."""
+                                   scanner, branch: str = None,
+                                   max_workers: int = None,
+                                   mode: str = 'contents',
+                                   blob_cache: BlobCache = None) -> Dict:
+        """Scan a GitHub repository for tokens.
+        
+        `mode='tree'` lists the whole repository with one git tree request and
+        downloads each distinct blob once, skipping blobs in `blob_cache`.
+        """
+        if mode == 'tree':
+            return self._scan_repository_tree(owner, repo, scanner, branch,
+                                              max_workers, blob_cache)
+        
         findings = []
         scanned_files = []
         errors = []
         
-        def scan_directory(path: str = ''):
-            """Recursively scan directory."""
-            contents = self.get_repository_contents(owner, repo, path)
-            
-            for item in contents:
-                if item['type'] == 'file':
-                    # Check if file should be scanned
-                    if scanner.should_scan_file(item['name']):
-                        try:
-                            content = self.get_file_content(owner, repo, item['path'])
-                            if content:
-                                file_findings = scanner.scan_text(
-                                    content, 
-                                    source=f"{owner}/{repo}/{item['path']}"
-                                )
-                                if file_findings:
-                                    findings.extend(file_findings)
-                                scanned_files.append(item['path'])
-                        except Exception as e:
-                            errors.append({
-                                'file': item['path'],
-                                'error': str(e)
-                            })
-                
-                elif item['type'] == 'dir':
-                    scan_directory(item['path'])
+        def on_file(path: str, content: Optional[str]):
+            """Scan a fetched file as soon as it arrives."""
+            if content:
+                file_findings = scanner.scan_text(
+                    content, 
+                    source=f"{owner}/{repo}/{path}",
+                    path=path,
+                    errors=errors
+                )
+                if file_findings:
+                    findings.extend(file_findings)
+                scanned_files.append(path)
         
         try:
-            scan_directory()
+            self._fetch_repository_files(owner, repo, scanner, on_file, errors,
+                                         branch=branch, max_workers=max_workers)
         except Exception as e:
             errors.append({'error': f"Repository scan failed: {str(e)}"})
         
@@ -170,6 +500,170 @@ class GitHubIntegration:
             'errors': errors
         }
     
+    def _scan_repository_tree(self, owner: str, repo: str, scanner,
+                              branch: str = None, max_workers: int = None,
+                              blob_cache: BlobCache = None) -> Dict:
+        """Scan a repository via its recursive git tree and blob API."""
+        findings = []
+        errors = []
+        blob_paths = {}
+        stats = {'blobs_fetched': 0, 'blobs_cached': 0}
+        
+        tree = self.get_repository_tree(owner, repo, branch)
+        if tree is None:
+            errors.append({'error': 'Repository tree could not be fetched'})
+            tree = {'tree': []}
+        elif tree.get('truncated'):
+            # Too large for a single tree response; fall back to the contents walk
+            result = self.scan_repository_for_tokens(owner, repo, scanner, branch,
+                                                     max_workers)
+            result['errors'].append({'error': 'Git tree truncated; used contents API'})
+            return result
+        
+        # Group paths by blob SHA so identical content is fetched once
+        for entry in tree.get('tree', []):
+            if entry.get('type') == 'blob' and scanner.should_scan_path(entry['path'],
+                                                                        entry.get('size')):
+                blob_paths.setdefault(entry['sha'], []).append(entry['path'])
+        
+        def add_findings(records: List, paths: List[str]):
+            """Materialise cached matches for every path sharing a blob."""
+            for path in paths:
+                for token_type, token_value, position, line_number in records:
+                    if not scanner.in_scope(token_type, path):
+                        continue
+                    findings.append(scanner.build_finding(
+                        token_type, token_value, f"{owner}/{repo}/{path}",
+                        position, line_number
+                    ))
+        
+        to_fetch = []
+        for sha, paths in blob_paths.items():
+            records = blob_cache.get(sha) if blob_cache is not None else None
+            if records is None:
+                to_fetch.append(sha)
+            else:
+                stats['blobs_cached'] += 1
+                add_findings(records, paths)
+        
+        local_cache = blob_cache if blob_cache is not None else BlobCache(cache_file=None)
+        
+        def on_blob(sha: str, content: Optional[str]):
+            """Scan a fetched blob once and fan findings out to its paths."""
+            if content is None:
+                errors.append({'file': blob_paths[sha][0], 'error': 'Blob could not be fetched'})
+                return
+            stats['blobs_fetched'] += 1
+            timeouts = []
+            blob_findings = scanner.scan_text(content, source=sha, scope_rules=False,
+                                              errors=timeouts)
+            for timeout in timeouts:
+                errors.extend(dict(timeout, file=f"{owner}/{repo}/{path}")
+                              for path in blob_paths[sha])
+            # A scan cut short by a time budget is reported but never cached
+            cache = BlobCache(cache_file=None) if timeouts else local_cache
+            cache.put(sha, blob_findings)
+            add_findings(cache.get(sha), blob_paths[sha])
+        
+        self._fetch_bounded(
+            to_fetch,
+            lambda sha: self.get_blob_content(owner, repo, sha),
+            on_blob, errors, max_workers
+        )
+        
+        if blob_cache is not None:
+            blob_cache.save()
+        
+        return {
+            'scan_id': datetime.utcnow().strftime('%Y%m%d%H%M%S'),
+            'repository': f"{owner}/{repo}",
+            'scan_mode': 'tree',
+            'scanned_at': datetime.utcnow().isoformat(),
+            'files_scanned': sum(len(paths) for paths in blob_paths.values()),
+            'unique_blobs': len(blob_paths),
+            'blobs_fetched': stats['blobs_fetched'],
+            'blobs_cached': stats['blobs_cached'],
+            'total_findings': len(findings),
+            'honeytokens_found': sum(1 for f in findings if f.get('is_honeytoken')),
+            'findings': findings,
+            'errors': errors
+        }
+    
+    def _fetch_bounded(self, keys, fetch, on_result, errors: List[Dict],
+                       max_workers: int = None):
+        """Run `fetch(key)` concurrently, calling `on_result(key, value)` in this thread."""
+        max_workers = max_workers or self.max_workers
+        keys = iter(keys)
+        in_flight = {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while True:
+                for key in keys:
+                    in_flight[pool.submit(fetch, key)] = key
+                    if len(in_flight) >= max_workers * 2:
+                        break
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = in_flight.pop(future)
+                    try:
+                        on_result(key, future.result())
+                    except Exception as e:
+                        errors.append({'file': str(key), 'error': str(e)})
+    
+    def _fetch_repository_files(self, owner: str, repo: str, scanner,
+                                on_file, errors: List[Dict],
+                                branch: str = None, max_workers: int = None):
+        """Walk a repository concurrently, handing each file's content to `on_file`.
+        
+        Directory listings and file downloads share one bounded thread pool;
+        results are consumed in the calling thread as they complete, so
+        `on_file` never runs concurrently and at most a few downloads are
+        held in memory at once.
+        """
+        max_workers = max_workers or self.max_workers
+        max_in_flight = max_workers * 2
+        backlog = deque([('dir', '')])
+        in_flight = {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while backlog or in_flight:
+                while backlog and len(in_flight) < max_in_flight:
+                    kind, path = backlog.popleft()
+                    if kind == 'dir':
+                        future = pool.submit(self.get_repository_contents,
+                                             owner, repo, path, branch)
+                    else:
+                        future = pool.submit(self.get_file_content,
+                                             owner, repo, path, branch)
+                    in_flight[future] = (kind, path)
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors.append({'file': path, 'error': str(e)})
+                        continue
+                    
+                    if kind == 'dir':
+                        # A file path returns a dict instead of a listing
+                        for item in result if isinstance(result, list) else []:
+                            if item['type'] == 'dir':
+                                if item['name'] not in scanner.EXCLUDE_PATHS:
+                                    backlog.append(('dir', item['path']))
+                            elif (item['type'] == 'file' and
+                                  scanner.should_scan_path(item['path'], item.get('size'))):
+                                backlog.append(('file', item['path']))
+                    else:
+                        try:
+                            on_file(path, result)
+                        except Exception as e:
+                            errors.append({'file': path, 'error': str(e)})
+    
     def create_repository_secret(self, owner: str, repo: str, 
                                  secret_name: str, secret_value: str) -> bool:
         """Create or update a repository secret (requires admin access)."""
@@ -177,8 +671,7 @@ class GitHubIntegration:
         url = f'{self.base_url}/repos/{owner}/{repo}/actions/secrets/public-key'
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
+            response = self._request('GET', url)
             public_key_data = response.json()
             
             # Encrypt the secret (requires PyNaCl library)
@@ -203,11 +696,10 @@ class GitHubIntegration:
                 'key_id': public_key_data['key_id']
             }
             
-            response = requests.put(url, headers=self.headers, json=data)
-            response.raise_for_status()
+            response = self._request('PUT', url, json_data=data)
             return True
         
-        except requests.exceptions.RequestException as e:
+        except GitHubAPIError as e:
             print(f"Error creating repository secret: {e}")
             return False
     
@@ -216,11 +708,10 @@ class GitHubIntegration:
         url = f'{self.base_url}/repos/{owner}/{repo}/actions/secrets'
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
+            response = self._request('GET', url)
             secrets_data = response.json()
             return [secret['name'] for secret in secrets_data.get('secrets', [])]
-        except requests.exceptions.RequestException as e:
+        except GitHubAPIError as e:
             print(f"Error listing repository secrets: {e}")
             return []
     
@@ -238,15 +729,14 @@ class GitHubIntegration:
             data['labels'] = labels
         
         try:
-            response = requests.post(url, headers=self.headers, json=data)
-            response.raise_for_status()
+            response = self._request('POST', url, json_data=data)
             issue = response.json()
             return {
                 'number': issue['number'],
                 'html_url': issue['html_url'],
                 'state': issue['state']
             }
-        except requests.exceptions.RequestException as e:
+        except GitHubAPIError as e:
             print(f"Error creating issue: {e}")
             return None
     
@@ -256,7 +746,7 @@ class GitHubIntegration:
         title = f"🚨 Honeytoken Detected: {detection.get('token_type', 'Unknown')}"
         
         body = f"""# Honeytoken Detection Alert
-        
+
 **Detection Time:** {detection.get('detected_at', 'Unknown')}
 **Token Type:** {detection.get('token_type', 'Unknown')}
 **Token ID:** {detection.get('honeytoken_id', 'Unknown')}
@@ -292,12 +782,10 @@ A honeytoken is a deliberately planted credential designed to detect unauthorize
         url = f'{self.base_url}/search/code'
         
         try:
-            response = requests.get(
-                url,
-                headers=self.headers,
+            response = self._request(
+                'GET', url,
                 params={'q': search_query, 'per_page': 100}
             )
-            response.raise_for_status()
             results = response.json()
             
             return [{
@@ -307,7 +795,7 @@ A honeytoken is a deliberately planted credential designed to detect unauthorize
                 'html_url': item['html_url']
             } for item in results.get('items', [])]
         
-        except requests.exceptions.RequestException as e:
+        except GitHubAPIError as e:
             print(f"Error searching code: {e}")
             return []
 
@@ -323,11 +811,23 @@ def main():
                        help='Scan a repository')
     parser.add_argument('--list-secrets', nargs=2, metavar=('OWNER', 'REPO'),
                        help='List repository secrets')
+    parser.add_argument('--branch', help='Branch or ref to scan')
+    parser.add_argument('--tree', action='store_true',
+                       help='Scan via the git tree/blob API with a blob cache')
+    parser.add_argument('--workers', type=int, default=8,
+                       help='Concurrent API requests when scanning')
+    parser.add_argument('--cache-dir', default='.github_cache',
+                       help='Directory for cached API responses (ETag revalidation)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Disable the API response cache')
     
     args = parser.parse_args()
     
     try:
-        gh = GitHubIntegration()
+        gh = GitHubIntegration(
+            max_workers=args.workers,
+            cache_dir=None if args.no_cache else args.cache_dir
+        )
         
         if args.test:
             result = gh.test_connection()
@@ -351,12 +851,21 @@ def main():
             
             owner, repo = args.scan_repo
             print(f"\nScanning {owner}/{repo}...")
-            result = gh.scan_repository_for_tokens(owner, repo, scanner)
+            if args.tree:
+                result = gh.scan_repository_for_tokens(
+                    owner, repo, scanner, branch=args.branch, mode='tree',
+                    blob_cache=BlobCache(scanner=scanner)
+                )
+            else:
+                result = gh.scan_repository_for_tokens(owner, repo, scanner,
+                                                       branch=args.branch)
             
             print(f"\n=== Scan Results ===")
             print(f"Files scanned: {result['files_scanned']}")
             print(f"Total findings: {result['total_findings']}")
             print(f"Honeytokens: {result['honeytokens_found']}")
+            print(f"API requests: {gh.stats['requests']} "
+                  f"({gh.stats['not_modified']} not modified)")
         
         elif args.list_secrets:
             owner, repo = args.list_secrets
@@ -0,0 +1,236 @@
+"""
+Org Scanner Module
+Scans every repository of a GitHub organization in parallel with resumable progress.
+"""
+
+import os
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict
+
+
+class OrgScanner:
+    """Orchestrate token scans across all repositories of an organization."""
+    
+    def __init__(self, github, scanner, checkpoint_file: str = 'org_scan_checkpoint.json',
+                 max_workers: int = 4, min_remaining: int = 100,
+                 max_wait: float = 3600, blob_cache=None):
+        """Initialize orchestrator.
+        
+        Args:
+            github: GitHubIntegration instance used for all API calls
+            scanner: TokenScanner used for matching and as the scan store
+            checkpoint_file: File recording completed repositories
+            max_workers: Repositories scanned at the same time
+            min_remaining: Pause scheduling when fewer API requests remain
+            max_wait: Longest pause for a rate-limit reset, in seconds
+            blob_cache: Optional BlobCache shared by all repositories
+        """
+        self.github = github
+        self.scanner = scanner
+        self.checkpoint_file = checkpoint_file
+        self.max_workers = max_workers
+        self.min_remaining = min_remaining
+        self.max_wait = max_wait
+        self.blob_cache = blob_cache
+    
+    def _load_checkpoint(self, org: str) -> Dict:
+        """Load an unfinished checkpoint for an organization, or start a new one."""
+        if os.path.exists(self.checkpoint_file):
+            try:
+                with open(self.checkpoint_file, 'r') as f:
+                    checkpoint = json.load(f)
+                if checkpoint.get('org') == org and not checkpoint.get('finished_at'):
+                    return checkpoint
+            except json.JSONDecodeError:
+                pass
+        
+        return {
+            'org': org,
+            'started_at': datetime.utcnow().isoformat(),
+            'completed': {},
+            'failed': {}
+        }
+    
+    def _save_checkpoint(self, checkpoint: Dict):
+        """Save checkpoint atomically so an interrupted write can't corrupt it."""
+        temp_file = f'{self.checkpoint_file}.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(temp_file, self.checkpoint_file)
+    
+    def clear_checkpoint(self):
+        """Forget progress so the next run starts from scratch."""
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+    
+    def throttle_delay(self) -> float:
+        """Seconds to wait before scheduling more work, based on the API rate limit."""
+        remaining = self.github.rate_limit.get('remaining')
+        reset = self.github.rate_limit.get('reset')
+        if remaining is None or remaining >= self.min_remaining or not reset:
+            return 0.0
+        if reset <= time.time():
+            return 0.0
+        return min(reset - time.time() + 1, self.max_wait)
+    
+    def _scan_repository(self, repo: Dict, mode: str) -> Dict:
+        """Scan one repository."""
+        owner, name = repo['full_name'].split('/', 1)
+        return self.github.scan_repository_for_tokens(
+            owner, name, self.scanner,
+            branch=repo.get('default_branch'),
+            mode=mode,
+            blob_cache=self.blob_cache
+        )
+    
+    def scan_organization(self, org: str, mode: str = 'tree',
+                          include_forks: bool = False,
+                          include_archived: bool = False) -> Dict:
+        """Scan all repositories of an organization, resuming any earlier run.
+        
+        Raises:
+            GitHubAPIError: If the organization's repositories can't be listed
+        """
+        checkpoint = self._load_checkpoint(org)
+        
+        repos = self.github.list_repositories(org=org, raise_errors=True)
+        repos = [
+            repo for repo in repos
+            if (include_forks or not repo.get('fork'))
+            and (include_archived or not repo.get('archived'))
+        ]
+        pending = [repo for repo in repos if repo['full_name'] not in checkpoint['completed']]
+        
+        print(f"\n🔍 Scanning organization: {org}")
+        print(f"   Repositories: {len(repos)} ({len(repos) - len(pending)} already done)")
+        
+        pending_iter = iter(pending)
+        next_repo = next(pending_iter, None)
+        in_flight = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while next_repo is not None or in_flight:
+                # Schedule more work only while the rate limit allows it
+                while next_repo is not None and len(in_flight) < self.max_workers:
+                    delay = self.throttle_delay()
+                    if delay and in_flight:
+                        break
+                    if delay:
+                        print(f"   Rate limit low, waiting {delay:.0f}s for reset...")
+                        time.sleep(delay)
+                    in_flight[pool.submit(self._scan_repository, next_repo, mode)] = next_repo
+                    next_repo = next(pending_iter, None)
+                
+                future = next(as_completed(in_flight))
+                repo = in_flight.pop(future)
+                self._record_result(checkpoint, repo, future)
+        
+        # A run with nothing left to retry is finished; the next one starts afresh
+        if not checkpoint['failed']:
+            checkpoint['finished_at'] = datetime.utcnow().isoformat()
+            self._save_checkpoint(checkpoint)
+        
+        completed = checkpoint['completed']
+        return {
+            'org': org,
+            'repositories': len(repos),
+            'completed': len(completed),
+            'failed': len(checkpoint['failed']),
+            'total_findings': sum(r['total_findings'] for r in completed.values()),
+            'honeytokens_found': sum(r['honeytokens_found'] for r in completed.values()),
+            'checkpoint_file': self.checkpoint_file
+        }
+    
+    def _record_result(self, checkpoint: Dict, repo: Dict, future):
+        """Stream a finished repository scan to the scan store and checkpoint it."""
+        full_name = repo['full_name']
+        try:
+            result = future.result()
+        except Exception as e:
+            checkpoint['failed'][full_name] = {'error': str(e)}
+            self._save_checkpoint(checkpoint)
+            print(f"   ✗ {full_name}: {e}")
+            return
+        
+        result['scan_type'] = 'github_repository'
+        result['target'] = full_name
+        self.scanner.record_scan(result)
+        
+        checkpoint['failed'].pop(full_name, None)
+        checkpoint['completed'][full_name] = {
+            'scan_id': result['scan_id'],
+            'files_scanned': result['files_scanned'],
+            'total_findings': result['total_findings'],
+            'honeytokens_found': result['honeytokens_found'],
+            'completed_at': datetime.utcnow().isoformat()
+        }
+        self._save_checkpoint(checkpoint)
+        print(f"   ✓ {full_name}: {result['total_findings']} finding(s), "
+              f"{result['honeytokens_found']} honeytoken(s)")
+
+
+def main():
+    """CLI interface for organization scans."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Scan all repositories of a GitHub organization')
+    parser.add_argument('org', help='Organization to scan')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Repositories scanned in parallel')
+    parser.add_argument('--mode', choices=['tree', 'contents'], default='tree',
+                       help='Repository fetch mode')
+    parser.add_argument('--checkpoint', default='org_scan_checkpoint.json',
+                       help='Checkpoint file for resuming interrupted runs')
+    parser.add_argument('--restart', action='store_true',
+                       help='Ignore the checkpoint and scan every repository')
+    parser.add_argument('--include-forks', action='store_true', help='Also scan forks')
+    parser.add_argument('--include-archived', action='store_true',
+                       help='Also scan archived repositories')
+    parser.add_argument('--cache-dir', default='.github_cache',
+                       help='Directory for cached API responses (ETag revalidation)')
+    
+    args = parser.parse_args()
+    
+    from github_integration import GitHubAPIError, GitHubIntegration, BlobCache
+    from token_scanner import TokenScanner
+    
+    try:
+        gh = GitHubIntegration(cache_dir=args.cache_dir)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    scanner = TokenScanner()
+    orchestrator = OrgScanner(
+        gh, scanner,
+        checkpoint_file=args.checkpoint,
+        max_workers=args.workers,
+        blob_cache=BlobCache(scanner=scanner) if args.mode == 'tree' else None
+    )
+    if args.restart:
+        orchestrator.clear_checkpoint()
+    
+    try:
+        summary = orchestrator.scan_organization(
+            args.org, mode=args.mode,
+            include_forks=args.include_forks,
+            include_archived=args.include_archived
+        )
+    except GitHubAPIError as e:
+        print(f"Error: could not list repositories of {args.org}: {e}")
+        sys.exit(1)
+    
+    print(f"\n=== Organization Scan: {summary['org']} ===")
+    print(f"Repositories: {summary['completed']}/{summary['repositories']} scanned")
+    print(f"Failed: {summary['failed']}")
+    print(f"Total findings: {summary['total_findings']}")
+    print(f"Honeytokens: {summary['honeytokens_found']}")
+    print(f"API requests: {gh.stats['requests']} ({gh.stats['not_modified']} not modified)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Pre-commit Hook Module
+Lightweight git hook entry point that blocks commits and pushes adding leaked tokens.
+"""
+
+import os
+import sys
+import subprocess
+from typing import Dict, Iterator, List, Tuple
+
+# Git passes this as the remote SHA when a push creates a new branch
+ZERO_SHA = '0' * 40
+
+# SHA of the empty tree, to diff branches with no published ancestor
+EMPTY_TREE_SHA = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
+
+HOOK_SCRIPT = '''#!/bin/sh
+# Installed by pre_commit_hook.py --install
+exec "{python}" "{script}" {hook_type} "$@"
+'''
+
+
+def _git(repo_path: str, *args) -> str:
+    """Run a git command and return its output."""
+    return subprocess.run(['git', *args], cwd=repo_path, capture_output=True,
+                          text=True, check=True).stdout.strip()
+
+
+def _commit_exists(repo_path: str, sha: str) -> bool:
+    """Check whether a commit is present in the local repository."""
+    return subprocess.run(['git', 'cat-file', '-e', f'{sha}^{{commit}}'], cwd=repo_path,
+                          capture_output=True).returncode == 0
+
+
+def _push_ranges(repo_path: str, push_refs: List[str]) -> Iterator[Tuple[str, str]]:
+    """Turn pre-push stdin lines into (base, head) ranges to scan."""
+    for line in push_refs:
+        fields = line.split()
+        if len(fields) != 4 or fields[1] == ZERO_SHA:
+            # Malformed, or a branch deletion
+            continue
+        
+        local_sha, remote_sha = fields[1], fields[3]
+        if remote_sha != ZERO_SHA and _commit_exists(repo_path, remote_sha):
+            yield remote_sha, local_sha
+            continue
+        
+        # New branch, or a remote head that was never fetched: start from the
+        # first commit not already on a remote
+        boundary = [
+            rev[1:] for rev in _git(repo_path, 'rev-list', '--boundary', local_sha,
+                                    '--not', '--remotes').splitlines()
+            if rev.startswith('-')
+        ]
+        yield (boundary[0] if boundary else EMPTY_TREE_SHA), local_sha
+
+
+def scan_changes(repo_path: str = '.', hook_type: str = 'pre-commit',
+                 push_refs: List[str] = None, scanner=None) -> Dict:
+    """Scan the lines a commit or push would add.
+    
+    Args:
+        repo_path: Repository to scan
+        hook_type: 'pre-commit' scans staged changes, 'pre-push' scans the
+            ranges described by `push_refs`
+        push_refs: Lines git passes to the pre-push hook on stdin
+        scanner: TokenScanner to use; by default a non-persisting one using
+            the honeytokens.json at the repository root
+    
+    Raises:
+        subprocess.CalledProcessError: If git cannot produce the changes
+    """
+    from git_reader import iter_diff_hunks
+    
+    if scanner is None:
+        from token_scanner import TokenScanner
+        root = _git(repo_path, 'rev-parse', '--show-toplevel')
+        scanner = TokenScanner(honeytokens_file=os.path.join(root, 'honeytokens.json'),
+                               persist=False)
+    
+    if hook_type == 'pre-push':
+        hunk_streams = [
+            iter_diff_hunks(repo_path, base_ref, head_ref)
+            for base_ref, head_ref in _push_ranges(repo_path, push_refs or [])
+        ]
+    else:
+        hunk_streams = [iter_diff_hunks(repo_path, cached=True)]
+    
+    findings = []
+    for hunks in hunk_streams:
+        for hunk in hunks:
+            if scanner.should_scan_path(hunk['path']):
+                findings.extend(scanner.scan_hunk(hunk))
+    
+    return {
+        'scan_type': hook_type,
+        'total_findings': len(findings),
+        'honeytokens_found': sum(1 for f in findings if f['is_honeytoken']),
+        'findings': findings
+    }
+
+
+def install_hook(repo_path: str = '.', hook_type: str = 'pre-commit',
+                 force: bool = False) -> str:
+    """Install this module as a git hook of a repository.
+    
+    Returns:
+        Path of the installed hook
+    """
+    hooks_dir = _git(repo_path, 'rev-parse', '--git-path', 'hooks')
+    hook_path = os.path.join(repo_path, hooks_dir, hook_type)
+    
+    if os.path.exists(hook_path) and not force:
+        raise FileExistsError(f"{hook_path} already exists (use --force to replace it)")
+    
+    os.makedirs(os.path.dirname(hook_path), exist_ok=True)
+    with open(hook_path, 'w') as f:
+        f.write(HOOK_SCRIPT.format(python=sys.executable,
+                                   script=os.path.abspath(__file__),
+                                   hook_type=hook_type))
+    os.chmod(hook_path, 0o755)
+    
+    return hook_path
+
+
+def main():
+    """CLI interface, invoked by git as a hook."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Block commits that add leaked tokens')
+    parser.add_argument('hook_type', nargs='?', choices=['pre-commit', 'pre-push'],
+                       default='pre-commit', help='Hook to run or install')
+    parser.add_argument('hook_args', nargs='*', help=argparse.SUPPRESS)
+    parser.add_argument('--install', action='store_true',
+                       help='Install as a hook in the current repository')
+    parser.add_argument('--force', action='store_true',
+                       help='Replace an existing hook when installing')
+    
+    args = parser.parse_args()
+    
+    if args.install:
+        try:
+            hook_path = install_hook(hook_type=args.hook_type, force=args.force)
+        except (FileExistsError, subprocess.CalledProcessError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"✓ Installed {args.hook_type} hook: {hook_path}")
+        return
+    
+    push_refs = sys.stdin.read().splitlines() if args.hook_type == 'pre-push' else None
+    
+    try:
+        result = scan_changes(hook_type=args.hook_type, push_refs=push_refs)
+    except subprocess.CalledProcessError as e:
+        # Fail closed: a hook that cannot scan must not let the change through
+        print(f"❌ Token scan failed: {e}", file=sys.stderr)
+        if e.stderr:
+            print(e.stderr.strip(), file=sys.stderr)
+        print("Fix the problem or bypass with --no-verify", file=sys.stderr)
+        sys.exit(1)
+    
+    leaks = [f for f in result['findings'] if not f['is_honeytoken']]
+    for finding in result['findings']:
+        marker = ' (honeytoken)' if finding['is_honeytoken'] else ''
+        print(f"{finding['file_path']}:{finding['line_number']}: "
+              f"{finding['token_type']}{marker} {finding['token_preview']}", file=sys.stderr)
+    
+    if leaks:
+        print(f"\n❌ {len(leaks)} possible leaked token(s) found; remove them or "
+              f"bypass with --no-verify", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Rate Limiter Module
+Token-bucket rate limiting shared by the webhook server and API clients.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at a fixed rate."""
+    
+    def __init__(self, rate: float, capacity: float):
+        """Initialize a full bucket refilling `rate` tokens per second."""
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        """Add the tokens accumulated since the last update."""
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+    
+    def consume(self, tokens: float = 1) -> bool:
+        """Take tokens from the bucket if available, without blocking."""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+    
+    def wait_time(self, tokens: float = 1) -> float:
+        """Seconds until `tokens` will be available."""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens or self.rate <= 0:
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+    
+    def acquire(self, tokens: float = 1):
+        """Block until tokens are available, then take them."""
+        while not self.consume(tokens):
+            time.sleep(max(self.wait_time(tokens), 0.001))
+
+
+class KeyedRateLimiter:
+    """Per-key token buckets (e.g. per source IP) with bounded memory."""
+    
+    def __init__(self, rate: float, capacity: float, max_keys: int = 10000):
+        """Initialize limiter; least recently used keys are evicted past `max_keys`."""
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def allow(self, key: Hashable, tokens: float = 1) -> bool:
+        """Check whether a request for `key` is within its rate limit."""
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self.buckets[key] = bucket
+                if len(self.buckets) > self.max_keys:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+        return bucket.consume(tokens)
+    
+    def retry_after(self, key: Hashable, tokens: float = 1) -> float:
+        """Seconds a rate-limited `key` should wait before retrying."""
+        with self.lock:
+            bucket = self.buckets.get(key)
+        return bucket.wait_time(tokens) if bucket else 0.0
+    
+    def stats(self) -> Dict:
+        """Get limiter statistics."""
+        return {
+            'rate': self.rate,
+            'capacity': self.capacity,
+            'tracked_keys': len(self.buckets)
+        }
+
+
+class RequestScheduler:
+    """Paces outgoing requests with a shared token bucket and honours server back-off."""
+    
+    def __init__(self, rate: float = 10, capacity: float = 20):
+        """Initialize scheduler allowing `rate` requests per second with bursts of `capacity`."""
+        self.bucket = TokenBucket(rate, capacity)
+        self.pause_until = 0.0
+        self.lock = threading.Lock()
+    
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds` (e.g. after a rate-limit response)."""
+        with self.lock:
+            self.pause_until = max(self.pause_until, time.monotonic() + seconds)
+    
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self.lock:
+                delay = self.pause_until - time.monotonic()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+        self.bucket.acquire()
@@ -0,0 +1,304 @@
+"""
+Rule Packs Module
+Loads user-defined token rules from TOML/YAML files and profiles rule performance.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import fnmatch
+from typing import Dict, Iterable, List, Optional
+from token_scanner import shannon_entropy
+
+RULE_FIELDS = {'id', 'regex', 'description', 'keywords', 'entropy', 'paths', 'budget_ms_per_mb'}
+
+# Type each rule field must have in a pack: 'string', 'number' or 'strings' (a list of strings)
+RULE_FIELD_TYPES = {
+    'id': 'string',
+    'regex': 'string',
+    'description': 'string',
+    'keywords': 'strings',
+    'entropy': 'number',
+    'paths': 'strings',
+    'budget_ms_per_mb': 'number'
+}
+
+
+class Rule:
+    """A token rule loaded from a rule pack."""
+    
+    def __init__(self, id: str, regex: str, description: str = '',
+                 keywords: Iterable[str] = (), entropy: Optional[float] = None,
+                 paths: Iterable[str] = (), budget_ms_per_mb: Optional[float] = None):
+        """Initialize and compile a rule.
+        
+        Args:
+            id: Token type reported for matches
+            regex: Pattern matching the token
+            description: Human-readable description
+            keywords: Literals of which at least one must appear (case-insensitive)
+                in the text before the regex runs
+            entropy: Minimum Shannon entropy (bits per character) of a match
+            paths: Glob patterns limiting which files the rule applies to
+            budget_ms_per_mb: Slowest acceptable scan time when profiling
+        
+        Raises:
+            ValueError: If the regex does not compile
+        """
+        self.id = id
+        self.regex = regex
+        self.description = description
+        self.keywords = tuple(keyword.lower() for keyword in keywords)
+        self.entropy = entropy
+        self.paths = tuple(paths)
+        self.budget_ms_per_mb = budget_ms_per_mb
+        try:
+            self.compiled = re.compile(regex)
+        except re.error as e:
+            raise ValueError(f"Rule '{id}': invalid regex: {e}") from e
+    
+    def applies_to(self, source: str) -> bool:
+        """Check whether the rule is in scope for a file path."""
+        if not self.paths:
+            return True
+        path = source.replace('\\', '/')
+        name = path.rsplit('/', 1)[-1]
+        return any(fnmatch.fnmatch(path, glob) or fnmatch.fnmatch(name, glob)
+                   for glob in self.paths)
+    
+    def prefilter(self, lowered_text: str) -> bool:
+        """Check whether any keyword occurs in the (lowercased) text."""
+        return not self.keywords or any(keyword in lowered_text for keyword in self.keywords)
+    
+    def accepts(self, value: str) -> bool:
+        """Check whether a match passes the rule's entropy threshold."""
+        return self.entropy is None or shannon_entropy(value) >= self.entropy
+    
+    def to_dict(self) -> Dict:
+        """Get the rule definition as a dict."""
+        return {
+            'id': self.id,
+            'regex': self.regex,
+            'description': self.description,
+            'keywords': list(self.keywords),
+            'entropy': self.entropy,
+            'paths': list(self.paths),
+            'budget_ms_per_mb': self.budget_ms_per_mb
+        }
+    
+    def __getstate__(self) -> Dict:
+        return self.to_dict()
+    
+    def __setstate__(self, state: Dict):
+        self.__init__(**state)
+    
+    def __repr__(self) -> str:
+        return f'Rule({self.id!r})'
+
+
+def _field_type_valid(value, expected: str) -> bool:
+    """Check a rule field value against its RULE_FIELD_TYPES entry."""
+    if expected == 'string':
+        return isinstance(value, str)
+    if expected == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def load_rule_pack(path: str) -> List[Rule]:
+    """Load rules from a TOML or YAML rule pack.
+    
+    A pack holds a top-level `rules` list; each entry needs `id` and `regex`
+    and may set `description`, `keywords`, `entropy`, `paths` and
+    `budget_ms_per_mb`.
+    
+    Raises:
+        ValueError: If the file is malformed or a rule is invalid
+    """
+    extension = os.path.splitext(path)[1].lower()
+    
+    if extension == '.toml':
+        import tomllib
+        
+        with open(path, 'rb') as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"{path}: {e}") from e
+    elif extension in ('.yml', '.yaml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path}: YAML rule packs require PyYAML (pip install PyYAML)")
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                data = yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path}: {e}") from e
+    else:
+        raise ValueError(f"{path}: rule packs must be .toml, .yml or .yaml files")
+    
+    entries = data.get('rules') if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a 'rules' list")
+    
+    rules = []
+    seen = set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or 'id' not in entry or 'regex' not in entry:
+            raise ValueError(f"{path}: rule #{index + 1} needs 'id' and 'regex'")
+        unknown = set(entry) - RULE_FIELDS
+        if unknown:
+            raise ValueError(f"{path}: rule '{entry['id']}' has unknown fields: "
+                             f"{', '.join(sorted(unknown))}")
+        for field, value in entry.items():
+            expected = RULE_FIELD_TYPES[field]
+            if not _field_type_valid(value, expected):
+                expected = 'a list of strings' if expected == 'strings' else f'a {expected}'
+                raise ValueError(f"{path}: rule '{entry['id']}' field '{field}' must be "
+                                 f"{expected}, got {type(value).__name__}")
+        if entry['id'] in seen:
+            raise ValueError(f"{path}: duplicate rule id '{entry['id']}'")
+        seen.add(entry['id'])
+        try:
+            rules.append(Rule(**entry))
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from e
+    
+    return rules
+
+
+def load_rule_packs(paths: Iterable[str]) -> List[Rule]:
+    """Load several rule packs; later packs override earlier rules with the same id."""
+    rules = {}
+    for path in paths:
+        for rule in load_rule_pack(path):
+            rules.pop(rule.id, None)
+            rules[rule.id] = rule
+    return list(rules.values())
+
+
+def profile_rules(scanner, paths: Iterable[str], repeat: int = 1) -> List[Dict]:
+    """Measure the time each built-in pattern and pack rule spends on a corpus.
+    
+    Args:
+        scanner: TokenScanner whose patterns and rules are profiled
+        paths: Files or directories making up the corpus
+        repeat: Scan each file this many times for steadier numbers
+    
+    Returns:
+        Per-rule stats sorted by time, slowest first
+    """
+    from pathlib import Path
+    
+    entries = [(name, regex, None) for name, regex in scanner.pattern_set]
+    entries += [(rule.id, rule.compiled, rule) for rule in scanner.rules]
+    stats = {
+        name: {'rule': name, 'seconds': 0.0, 'matches': 0,
+               'budget_ms_per_mb': rule.budget_ms_per_mb if rule else None}
+        for name, _, rule in entries
+    }
+    total_bytes = 0
+    
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(str(p) for p in Path(path).rglob('*')
+                         if p.is_file() and scanner.should_scan_file(str(p)))
+        else:
+            files.append(path)
+    
+    for file_path in files:
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        except OSError:
+            continue
+        total_bytes += len(text.encode('utf-8')) * repeat
+        lowered = text.lower()
+        
+        for name, regex, rule in entries:
+            # Prefilter and scope checks are part of the rule's cost
+            started = time.perf_counter()
+            for _ in range(repeat):
+                matches = 0
+                if rule is None or (rule.applies_to(file_path) and rule.prefilter(lowered)):
+                    matches = sum(1 for _ in regex.finditer(text))
+            stats[name]['seconds'] += time.perf_counter() - started
+            stats[name]['matches'] += matches
+    
+    total_seconds = sum(s['seconds'] for s in stats.values()) or 1e-9
+    megabytes = total_bytes / (1024 * 1024) or 1e-9
+    for s in stats.values():
+        s['ms_per_mb'] = s['seconds'] * 1000 / megabytes
+        s['share'] = s['seconds'] / total_seconds
+    
+    return sorted(stats.values(), key=lambda s: -s['seconds'])
+
+
+def main():
+    """CLI interface for rule packs."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Validate and profile token rule packs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    validate_parser = subparsers.add_parser('validate', help='Check rule pack files')
+    validate_parser.add_argument('packs', nargs='+', help='Rule pack files')
+    
+    profile_parser = subparsers.add_parser('profile', help='Time each rule on a corpus')
+    profile_parser.add_argument('corpus', nargs='+', help='Files or directories to scan')
+    profile_parser.add_argument('--rules', action='append', default=[],
+                               help='Rule pack to include (repeatable)')
+    profile_parser.add_argument('--repeat', type=int, default=1,
+                               help='Scan the corpus this many times')
+    profile_parser.add_argument('--budget-ms-per-mb', type=float,
+                               help='Fail when a rule without its own budget is slower than this')
+    profile_parser.add_argument('--json', action='store_true', help='Print stats as JSON')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'validate':
+        failed = False
+        for pack in args.packs:
+            try:
+                rules = load_rule_pack(pack)
+                print(f"✓ {pack}: {len(rules)} rule(s)")
+            except (OSError, ValueError) as e:
+                print(f"✗ {e}")
+                failed = True
+        sys.exit(1 if failed else 0)
+    
+    from token_scanner import TokenScanner
+    
+    try:
+        scanner = TokenScanner(rule_packs=args.rules, persist=False)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    stats = profile_rules(scanner, args.corpus, repeat=args.repeat)
+    over_budget = []
+    for s in stats:
+        budget = s['budget_ms_per_mb'] if s['budget_ms_per_mb'] is not None else args.budget_ms_per_mb
+        if budget is not None and s['ms_per_mb'] > budget:
+            over_budget.append(s['rule'])
+    
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print(f"\n{'Rule':<24} {'ms/MB':>10} {'Share':>7} {'Matches':>8}")
+        print("-" * 52)
+        for s in stats:
+            flag = '  ⚠️ over budget' if s['rule'] in over_budget else ''
+            print(f"{s['rule']:<24} {s['ms_per_mb']:>10.1f} {s['share']:>6.1%} "
+                  f"{s['matches']:>8}{flag}")
+    
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
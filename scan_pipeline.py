@@ -0,0 +1,333 @@
+"""
+Scan Pipeline Module
+Runs local, git and GitHub sources through one asyncio pipeline with a process-pool scan stage.
+"""
+
+import os
+import sys
+import json
+import asyncio
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, TextIO
+
+# Scanner used by scan workers, set up once per worker process
+_worker_scanner = None
+
+
+def iter_directory_items(directory: str, scanner) -> Iterator[Dict]:
+    """Yield scan items for the files of a directory; workers read the files themselves."""
+    from pathlib import Path
+    
+    for file_path in Path(directory).rglob('*'):
+        if file_path.is_file() and scanner.should_scan_file(str(file_path)):
+            yield {'source': str(file_path), 'path': str(file_path)}
+
+
+def iter_git_diff_items(repo_path: str, base_ref: str, head_ref: str, scanner) -> Iterator[Dict]:
+    """Yield scan items for the files changed between two refs, read from the object database."""
+    from git_reader import GitBlobReader, iter_diff_blobs
+    
+    to_read = [
+        (change['blob_sha'], change['path'])
+        for change in iter_diff_blobs(repo_path, base_ref, head_ref)
+        if change['blob_sha'] and scanner.should_scan_path(change['path'])
+    ]
+    with GitBlobReader(repo_path) as reader:
+        for (blob_sha, path), content in reader.iter_blobs(to_read, max_size=scanner.MAX_FILE_SIZE):
+            # Oversized and binary blobs are not scanned
+            if content is None or b'\0' in content[:8000]:
+                continue
+            yield {'source': path, 'path': path, 'blob_sha': blob_sha,
+                   'text': content.decode('utf-8', errors='ignore')}
+
+
+def iter_github_items(github, owner: str, repo: str, scanner, branch: str = None) -> Iterator[Dict]:
+    """Yield scan items for the files of a GitHub repository via its git tree and blob API."""
+    tree = github.get_repository_tree(owner, repo, branch)
+    if tree is None:
+        raise RuntimeError(f"{owner}/{repo}: repository tree could not be fetched")
+    
+    # Identical content under several paths is fetched once and yielded for
+    # all of them together, so only one blob is held at a time
+    paths_by_sha = {}
+    for entry in tree.get('tree', []):
+        if entry.get('type') == 'blob' and scanner.should_scan_path(entry['path'], entry.get('size')):
+            paths_by_sha.setdefault(entry['sha'], []).append(entry['path'])
+    
+    for blob_sha, paths in paths_by_sha.items():
+        text = github.get_blob_content(owner, repo, blob_sha)
+        if text is None:
+            continue
+        for path in paths:
+            yield {'source': f"{owner}/{repo}/{path}", 'path': path,
+                   'blob_sha': blob_sha, 'text': text}
+
+
+def _init_worker(options: Dict, rules: List, honeytokens: Dict):
+    """Set up the scanner of a worker process."""
+    global _worker_scanner
+    from token_scanner import TokenScanner
+    
+    _worker_scanner = TokenScanner(persist=False, **options)
+    _worker_scanner.rules = rules
+    _worker_scanner.honeytokens = honeytokens
+
+
+def _scan_item(item: Dict) -> Dict:
+    """Scan one item in a worker."""
+    errors = []
+    text = item.get('text')
+    if text is None and _worker_scanner.scan_archives:
+        from archive_reader import is_archive
+        
+        if is_archive(item['path']):
+            findings, metadata = _worker_scanner.scan_archive(item['path'])
+            for finding in findings:
+                finding['file_path'] = item['path']
+            return {'source': item['source'], 'findings': findings,
+                    'errors': metadata['timeouts'] + metadata['archive_errors']}
+    if text is None:
+        try:
+            with open(item['path'], 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        except OSError as e:
+            return {'source': item['source'], 'findings': [],
+                    'errors': [{'file': item['source'], 'error': str(e)}]}
+    
+    findings = _worker_scanner.scan_text(text, source=item['source'], path=item['path'],
+                                         errors=errors)
+    for finding in findings:
+        finding['file_path'] = item['path']
+        if 'blob_sha' in item:
+            finding['blob_sha'] = item['blob_sha']
+    
+    return {'source': item['source'], 'findings': findings, 'errors': errors}
+
+
+async def _pump(items: Iterable[Dict], queue: asyncio.Queue, errors: List[Dict]):
+    """Run a blocking producer in a thread, putting its items on a bounded queue."""
+    loop = asyncio.get_running_loop()
+    
+    def produce():
+        for item in items:
+            # Blocks the producer thread while the queue is full
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+    
+    try:
+        await asyncio.to_thread(produce)
+    except Exception as e:
+        errors.append({'error': f"Producer failed: {e}"})
+
+
+async def run_pipeline(sources: List[Iterable[Dict]], scanner=None, workers: int = None,
+                       queue_size: int = 64, alert_system=None, output: TextIO = None,
+                       use_processes: bool = True,
+                       on_result: Callable[[Dict], None] = None) -> Dict:
+    """Scan items from several producers concurrently.
+    
+    Producers (see the iter_*_items functions) run in threads and feed a
+    bounded queue, scan workers hand items to a process pool, and a single
+    consumer collects results, writes findings to `output` as JSON lines and
+    dispatches honeytoken alerts without waiting for the rest of the scan.
+    Both queues hold at most `queue_size` items, so fast producers wait for
+    the scan stage instead of piling up file contents in memory.
+    
+    Args:
+        sources: Iterables of scan items (dicts with source, path and
+            optionally text; items without text are read by the worker)
+        scanner: TokenScanner whose settings, rules and honeytokens the
+            workers use and which records the scan; a default one if None
+        workers: Scan processes (default: CPU count)
+        queue_size: Capacity of the item and result queues
+        alert_system: AlertSystem notified of each honeytoken found
+        output: Stream findings are written to as they arrive
+        use_processes: Scan in a process pool; False uses threads
+        on_result: Called with each item's result as it arrives
+    
+    Returns:
+        Scan result dict
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from token_scanner import TokenScanner, json_default
+    
+    if scanner is None:
+        scanner = TokenScanner()
+    workers = workers or os.cpu_count() or 1
+    started_at = datetime.utcnow()
+    
+    options = {
+        'file_time_budget': scanner.file_time_budget,
+        'rule_time_budget': scanner.rule_time_budget,
+        'validate_checksums': scanner.validate_checksums,
+        'honeytokens_only': scanner.honeytokens_only,
+        'scan_archives': scanner.scan_archives
+    }
+    initargs = (options, scanner.rules, scanner.honeytokens)
+    if use_processes:
+        import multiprocessing
+        
+        # Forking while producer threads run could copy a held lock into the
+        # workers, so they are started from a clean process instead
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=initargs,
+                                       mp_context=multiprocessing.get_context(method))
+    else:
+        _init_worker(*initargs)
+        executor = ThreadPoolExecutor(max_workers=workers)
+    
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue(maxsize=queue_size)
+    results = asyncio.Queue(maxsize=queue_size)
+    done = object()
+    all_findings = []
+    errors = []
+    alerts = []
+    stats = {'scanned': 0}
+    
+    async def produce():
+        await asyncio.gather(*(_pump(source, items, errors) for source in sources))
+        for _ in range(workers):
+            await items.put(done)
+    
+    async def scan():
+        while True:
+            item = await items.get()
+            if item is done:
+                break
+            try:
+                result = await loop.run_in_executor(executor, _scan_item, item)
+            except Exception as e:
+                result = {'source': item['source'], 'findings': [],
+                          'errors': [{'file': item['source'], 'error': str(e)}]}
+            await results.put(result)
+        await results.put(done)
+    
+    async def consume():
+        remaining = workers
+        while remaining:
+            result = await results.get()
+            if result is done:
+                remaining -= 1
+                continue
+            stats['scanned'] += 1
+            errors.extend(result['errors'])
+            all_findings.extend(result['findings'])
+            for finding in result['findings']:
+                if output is not None:
+                    output.write(json.dumps(finding, default=json_default) + '\n')
+                if finding['is_honeytoken'] and alert_system is not None:
+                    alerts.append(asyncio.create_task(
+                        asyncio.to_thread(alert_system.send_all_alerts, finding.to_dict())
+                    ))
+            if on_result is not None:
+                on_result(result)
+    
+    try:
+        await asyncio.gather(produce(), *(scan() for _ in range(workers)), consume())
+        alert_results = await asyncio.gather(*alerts, return_exceptions=True)
+    finally:
+        executor.shutdown()
+    
+    scan_result = {
+        'scan_id': started_at.strftime('%Y%m%d%H%M%S'),
+        'scan_type': 'pipeline',
+        'started_at': started_at.isoformat(),
+        'completed_at': datetime.utcnow().isoformat(),
+        'total_files_scanned': stats['scanned'],
+        'total_findings': len(all_findings),
+        'honeytokens_found': sum(1 for f in all_findings if f['is_honeytoken']),
+        'alerts_dispatched': sum(1 for r in alert_results if isinstance(r, dict) and any(r.values())),
+        'findings': all_findings,
+        'errors': errors
+    }
+    
+    scanner.record_scan(scan_result)
+    
+    return scan_result
+
+
+def scan_sources(sources: List[Iterable[Dict]], **kwargs) -> Dict:
+    """Run the pipeline from synchronous code; see run_pipeline."""
+    return asyncio.run(run_pipeline(sources, **kwargs))
+
+
+def main():
+    """CLI interface for the scan pipeline."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Scan local, git and GitHub sources concurrently')
+    parser.add_argument('--dir', action='append', default=[], help='Directory to scan (repeatable)')
+    parser.add_argument('--git-diff', action='append', default=[], metavar='BASE..HEAD',
+                       help='Scan files changed in a ref range of --repo (repeatable)')
+    parser.add_argument('--repo', default='.', help='Local repository for --git-diff')
+    parser.add_argument('--github', action='append', default=[], metavar='OWNER/REPO',
+                       help='Scan a GitHub repository (repeatable)')
+    parser.add_argument('--workers', type=int, help='Scan processes (default: CPU count)')
+    parser.add_argument('--queue-size', type=int, default=64,
+                       help='Items buffered between stages')
+    parser.add_argument('--threads', action='store_true',
+                       help='Scan in threads instead of processes')
+    parser.add_argument('--alert', action='store_true',
+                       help='Send alerts for honeytokens as they are found')
+    parser.add_argument('--output', help='Write findings to this file as JSON lines')
+    parser.add_argument('--rules', action='append', default=[],
+                       help='Rule pack (TOML/YAML) adding token rules (repeatable)')
+    parser.add_argument('--honeytokens-only', action='store_true',
+                       help='Only look for registered honeytoken values')
+    parser.add_argument('--archives', action='store_true',
+                       help='Also scan inside zip, jar, whl, tar and compressed files')
+    
+    args = parser.parse_args()
+    
+    if not (args.dir or args.git_diff or args.github):
+        parser.print_help()
+        return
+    
+    from token_scanner import TokenScanner
+    
+    try:
+        scanner = TokenScanner(rule_packs=args.rules, honeytokens_only=args.honeytokens_only,
+                               scan_archives=args.archives)
+    except (OSError, ValueError) as e:
+        print(f"Error loading rule pack: {e}")
+        sys.exit(2)
+    
+    sources = [iter_directory_items(directory, scanner) for directory in args.dir]
+    for ref_range in args.git_diff:
+        base_ref, _, head_ref = ref_range.partition('..')
+        sources.append(iter_git_diff_items(args.repo, base_ref, head_ref or 'HEAD', scanner))
+    if args.github:
+        from github_integration import GitHubIntegration
+        
+        github = GitHubIntegration()
+        for full_name in args.github:
+            owner, _, repo = full_name.partition('/')
+            sources.append(iter_github_items(github, owner, repo, scanner))
+    
+    alert_system = None
+    if args.alert:
+        from alert_system import AlertSystem
+        alert_system = AlertSystem()
+    
+    output = open(args.output, 'w') if args.output else None
+    try:
+        result = scan_sources(sources, scanner=scanner, workers=args.workers,
+                              queue_size=args.queue_size, alert_system=alert_system,
+                              output=output, use_processes=not args.threads)
+    finally:
+        if output is not None:
+            output.close()
+    
+    print(f"\n=== Pipeline Scan ===")
+    print(f"Files scanned: {result['total_files_scanned']}")
+    print(f"Total findings: {result['total_findings']}")
+    print(f"Honeytokens found: {result['honeytokens_found']}")
+    if args.alert:
+        print(f"Alerts dispatched: {result['alerts_dispatched']}")
+    for error in result['errors']:
+        print(f"⚠️  {error.get('file', 'pipeline')}: {error['error']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,10 +6,302 @@ Scans files and repositories for leaked tokens using regex patterns.
 import re
 import os
 import json
+import math
+import time
+import zlib
+import base64
+import hashlib
+import binascii
+import functools
+from collections import Counter
+from collections.abc import MutableMapping
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterable, Iterator, Mapping, Pattern, Tuple
 from pathlib import Path
 
+# With time budgets set, text is matched in segments of this many characters
+# and the budgets are checked between segments and between matches, since the
+# re module can't interrupt a match that is already running
+BUDGET_SEGMENT_SIZE = 256 * 1024
+
+# Segments overlap by this much so tokens straddling a boundary still match
+BUDGET_SEGMENT_OVERLAP = 4096
+
+BASE62_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def github_token_checksum(body: str) -> str:
+    """Base62-encoded CRC32 that GitHub appends to the random part of a token."""
+    crc = zlib.crc32(body.encode('ascii'))
+    encoded = ''
+    while crc:
+        crc, digit = divmod(crc, 62)
+        encoded = BASE62_ALPHABET[digit] + encoded
+    return encoded.rjust(6, '0')
+
+
+def github_checksum_valid(token: str) -> bool:
+    """Check the checksum in the last 6 characters of a prefixed GitHub token."""
+    return github_token_checksum(token[4:-6]) == token[-6:]
+
+
+def jwt_header_valid(token: str) -> bool:
+    """Check a JWT's header segment decodes to a JSON object naming an algorithm."""
+    header = token.split('.', 1)[0]
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(header + '=' * (-len(header) % 4)))
+    except (ValueError, binascii.Error):
+        return False
+    return isinstance(decoded, dict) and 'alg' in decoded
+
+
+def shannon_entropy(value: str) -> float:
+    """Shannon entropy of a string in bits per character."""
+    if not value:
+        return 0.0
+    length = len(value)
+    return -sum(count / length * math.log2(count / length)
+                for count in Counter(value).values())
+
+
+def path_shard(path: str, shard_count: int) -> int:
+    """Shard of a file, from a hash of its relative path that every machine computes alike."""
+    digest = hashlib.sha256(path.replace('\\', '/').encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count
+
+
+class PatternSet:
+    """Immutable set of named, precompiled token patterns.
+    
+    Use get_pattern_set() rather than the constructor so each distinct set is
+    compiled once per process. Pickling sends only the pattern sources, and
+    unpickling goes through the same per-process cache, so worker processes
+    compile at most once too.
+    """
+    
+    __slots__ = ('sources', 'compiled', 'fingerprint')
+    
+    def __init__(self, sources: Tuple[Tuple[str, str], ...]):
+        """Compile (name, regex) pairs."""
+        object.__setattr__(self, 'sources', tuple(sources))
+        object.__setattr__(self, 'compiled', tuple(
+            (name, re.compile(pattern)) for name, pattern in self.sources
+        ))
+        object.__setattr__(self, 'fingerprint', hashlib.sha256(
+            json.dumps(dict(self.sources), sort_keys=True).encode('utf-8')
+        ).hexdigest())
+    
+    def __setattr__(self, name, value):
+        raise AttributeError('PatternSet is immutable')
+    
+    def __iter__(self) -> Iterator[Tuple[str, Pattern]]:
+        return iter(self.compiled)
+    
+    def __len__(self) -> int:
+        return len(self.compiled)
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PatternSet) and self.sources == other.sources
+    
+    def __hash__(self) -> int:
+        return hash(self.sources)
+    
+    def __reduce__(self):
+        return (_compile_pattern_set, (self.sources,))
+    
+    def __repr__(self) -> str:
+        return f'PatternSet({len(self)} patterns, {self.fingerprint[:12]})'
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_pattern_set(sources: Tuple[Tuple[str, str], ...]) -> PatternSet:
+    """Compile a pattern set once per process."""
+    return PatternSet(sources)
+
+
+def get_pattern_set(patterns: Mapping[str, str]) -> PatternSet:
+    """Get the compiled pattern set for a mapping of token type to regex."""
+    return _compile_pattern_set(tuple(patterns.items()))
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_interruptible(pattern: str):
+    """Compile a pattern with the `regex` module, whose matching takes a timeout.
+    
+    Returns None when the module is not installed or rejects the pattern.
+    """
+    try:
+        import regex
+    except ImportError:
+        return None
+    try:
+        return regex.compile(pattern)
+    except regex.error:
+        return None
+
+
+def _finditer_segments(pattern: Pattern, text: str, deadline: float) -> Iterator:
+    """Match a pattern segment by segment, raising TimeoutError past the deadline."""
+    end = 0
+    for segment_start in range(0, len(text), BUDGET_SEGMENT_SIZE):
+        if segment_start and time.perf_counter() > deadline:
+            raise TimeoutError
+        segment_end = segment_start + BUDGET_SEGMENT_SIZE
+        for match in pattern.finditer(text, max(segment_start, end),
+                                      segment_end + BUDGET_SEGMENT_OVERLAP):
+            if match.start() >= segment_end:
+                break
+            end = match.end()
+            yield match
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+
+
+def _with_line_numbers(matches: Iterator, text: str) -> Iterator:
+    """Pair matches, which come in text order, with their 1-based line numbers."""
+    line, counted = 1, 0
+    for match in matches:
+        start = match.start()
+        line += text.count('\n', counted, start)
+        counted = start
+        yield match, line
+
+
+class Finding(MutableMapping):
+    """A token match, stored compactly but read and written like a finding dict.
+    
+    The standard keys live in slots, token_preview is derived on access and
+    detected_at is one string shared by every finding of a scan. Any other
+    key (file_path, commit, ...) goes to a dict created on first use.
+    Serialise with to_dict() or json.dump(..., default=json_default).
+    """
+    
+    __slots__ = ('token_type', 'token_value', 'source', 'position', 'line_number',
+                 'is_honeytoken', 'honeytoken_id', 'detected_at', 'extras')
+    
+    # Keys in the order finding dicts have always had
+    KEYS = ('token_type', 'token_value', 'token_preview', 'source', 'position',
+            'line_number', 'is_honeytoken', 'honeytoken_id', 'detected_at')
+    
+    _SLOT_KEYS = frozenset(KEYS) - {'token_preview'}
+    
+    def __init__(self, token_type: str, token_value: str, source: str, position: int,
+                 line_number: int, is_honeytoken: bool = False, honeytoken_id: str = None,
+                 detected_at: str = None):
+        self.token_type = token_type
+        self.token_value = token_value
+        self.source = source
+        self.position = position
+        self.line_number = line_number
+        self.is_honeytoken = is_honeytoken
+        self.honeytoken_id = honeytoken_id
+        self.detected_at = detected_at
+        self.extras = None
+    
+    def __getitem__(self, key: str):
+        if key in self._SLOT_KEYS:
+            return getattr(self, key)
+        if self.extras is not None and key in self.extras:
+            return self.extras[key]
+        if key == 'token_preview':
+            value = self.token_value
+            return value[:20] + '...' if len(value) > 20 else value
+        raise KeyError(key)
+    
+    def __setitem__(self, key: str, value):
+        if key in self._SLOT_KEYS:
+            setattr(self, key, value)
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[key] = value
+    
+    def __delitem__(self, key: str):
+        if key in self._SLOT_KEYS or (key == 'token_preview' and not
+                                      (self.extras and key in self.extras)):
+            raise TypeError(f"Standard finding key {key!r} cannot be removed")
+        if self.extras is None or key not in self.extras:
+            raise KeyError(key)
+        del self.extras[key]
+    
+    def __contains__(self, key) -> bool:
+        return key in self.KEYS or (self.extras is not None and key in self.extras)
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from self.KEYS
+        if self.extras:
+            yield from (key for key in self.extras if key != 'token_preview')
+    
+    def __len__(self) -> int:
+        extras = self.extras or ()
+        return len(self.KEYS) + len(extras) - ('token_preview' in extras)
+    
+    def to_dict(self) -> Dict:
+        """Get the finding as a plain dict."""
+        return {key: self[key] for key in self}
+    
+    def __repr__(self) -> str:
+        return f'Finding({self.to_dict()!r})'
+
+
+def json_default(obj):
+    """`default` hook for json.dump that writes Finding objects as dicts."""
+    if isinstance(obj, Finding):
+        return obj.to_dict()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class HoneytokenMatcher:
+    """Exact-string search for many honeytoken values in one pass.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed. Otherwise
+    each distinct value prefix is located with str.find and the candidates
+    starting there are checked with set lookups; planted values share a few
+    type prefixes (ghp_, AKIA, ...), so that is a handful of C-level scans.
+    """
+    
+    PREFIX_LENGTH = 4
+    
+    def __init__(self, values: Iterable[str]):
+        """Index the values to search for."""
+        # Kept to tell whether a registry still matches this index
+        self.values = frozenset(values)
+        values = {value for value in self.values if value}
+        self.automaton = None
+        try:
+            import ahocorasick
+        except ImportError:
+            ahocorasick = None
+        if ahocorasick is not None and values:
+            self.automaton = ahocorasick.Automaton()
+            for value in values:
+                self.automaton.add_word(value, value)
+            self.automaton.make_automaton()
+        
+        # prefix -> {length: values}
+        self.candidates = {}
+        for value in values:
+            by_length = self.candidates.setdefault(value[:self.PREFIX_LENGTH], {})
+            by_length.setdefault(len(value), set()).add(value)
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (position, value) for every occurrence; order is unspecified."""
+        if self.automaton is not None:
+            for end, value in self.automaton.iter(text):
+                yield end - len(value) + 1, value
+            return
+        
+        for prefix, by_length in self.candidates.items():
+            position = text.find(prefix)
+            while position != -1:
+                for length, values in by_length.items():
+                    if text[position:position + length] in values:
+                        yield position, text[position:position + length]
+                position = text.find(prefix, position + 1)
+
 
 class TokenScanner:
     """Scanner for detecting tokens using regex patterns (no ML)."""
@@ -31,13 +323,24 @@ class TokenScanner:
         'google_oauth': r'ya29\.[0-9A-Za-z\-_]+',
         'private_key': r'-----BEGIN (RSA |EC )?PRIVATE KEY-----',
         'generic_api_key': r'(?i)(api[_-]?key|apikey|access[_-]?token)["\']?\s*[:=]\s*["\']([a-zA-Z0-9_\-]{20,})["\']',
-        'generic_secret': r'(?i)(secret|password|passwd|pwd)["\']?\s*[:=]\s*["\']([^"\']{8,})["\']',
+        'generic_secret': r'(?i)(secret|password|passwd|pwd)["\']?\s*[:=]\s*["\']([^"\'\r\n]{8,})["\']',
         'jwt_token': r'eyJ[a-zA-Z0-9_-]*\.eyJ[a-zA-Z0-9_-]*\.[a-zA-Z0-9_-]*',
-        'azure_pat': r'[a-z0-9]{52}',
+        'azure_pat': r'(?<![a-z0-9])[a-z0-9]{52}(?![a-z0-9])',
         'npm_token': r'npm_[a-zA-Z0-9]{36}',
         'docker_auth': r'"auth":\s*"[a-zA-Z0-9+/=]{40,}"',
     }
     
+    # Minimum Shannon entropy (bits per character) of the secret matched by
+    # generic patterns; lower-entropy matches are placeholders and plain words
+    ENTROPY_THRESHOLDS = {
+        'azure_pat': 3.5,
+        'generic_api_key': 3.0,
+        'generic_secret': 2.5,
+    }
+    
+    # Token types whose last 6 characters are a checksum of the random part
+    CHECKSUM_TOKEN_TYPES = {'github_pat', 'github_oauth'}
+    
     # File extensions to scan
     SCANNABLE_EXTENSIONS = {
         '.py', '.js', '.ts', '.java', '.go', '.rb', '.php', '.sh', '.bash',
@@ -53,13 +356,111 @@ class TokenScanner:
         'vendor', 'target', 'bin', 'obj', '.idea', '.vscode'
     }
     
+    # Maximum file size to scan (10MB)
+    MAX_FILE_SIZE = 10 * 1024 * 1024
+    
     def __init__(self, honeytokens_file: str = 'honeytokens.json',
-                 scan_results_file: str = 'scan_results.json'):
-        """Initialize the scanner."""
+                 scan_results_file: str = 'scan_results.json',
+                 persist: bool = True, rule_packs: List[str] = None,
+                 file_time_budget: float = None, rule_time_budget: float = None,
+                 validate_checksums: bool = False, honeytokens_only: bool = False,
+                 scan_archives: bool = False):
+        """Initialize the scanner.
+        
+        With `persist` disabled scan history is neither loaded nor saved,
+        for short-lived callers such as git hooks. Rules from `rule_packs`
+        (TOML/YAML files) are added to PATTERNS, replacing built-in patterns
+        with the same id. `file_time_budget` and `rule_time_budget` cap the
+        seconds spent matching one text, and one pattern on one text; matching
+        stops once either runs out and the overrun is reported as a scan error.
+        With `validate_checksums` GitHub tokens whose checksum does not match
+        are discarded as made-up examples. With `honeytokens_only` the
+        patterns are skipped and texts are only searched for the exact values
+        of registered honeytokens (see scan_honeytokens). With `scan_archives`
+        zip, tar and compressed files are scanned member by member (see
+        scan_archive).
+        """
         self.honeytokens_file = honeytokens_file
         self.scan_results_file = scan_results_file
-        self.honeytokens = self._load_honeytokens()
-        self.scan_results = self._load_scan_results()
+        self.persist = persist
+        self.file_time_budget = file_time_budget
+        self.rule_time_budget = rule_time_budget
+        self.validate_checksums = validate_checksums
+        self.honeytokens_only = honeytokens_only
+        self.scan_archives = scan_archives
+        self.rules = []
+        if rule_packs:
+            from rule_packs import load_rule_packs
+            self.rules = load_rule_packs(rule_packs)
+        # Both stores are loaded on first use
+        self._honeytokens = None
+        self._honeytoken_matcher = None
+        self._scan_results = None if persist else []
+    
+    @property
+    def honeytokens(self) -> Dict:
+        """Known honeytokens keyed by token value."""
+        if self._honeytokens is None:
+            self._honeytokens = self._load_honeytokens()
+        return self._honeytokens
+    
+    @honeytokens.setter
+    def honeytokens(self, value: Dict):
+        self._honeytokens = value
+        self._honeytoken_matcher = None
+    
+    @property
+    def honeytoken_matcher(self) -> HoneytokenMatcher:
+        """Matcher for the registered honeytoken values, rebuilt when the registry changes."""
+        # Compared by value, so the registry dict may also be edited in place
+        if (self._honeytoken_matcher is None or
+                self._honeytoken_matcher.values != self.honeytokens.keys()):
+            self._honeytoken_matcher = HoneytokenMatcher(self.honeytokens)
+        return self._honeytoken_matcher
+    
+    @property
+    def pattern_set(self) -> PatternSet:
+        """Compiled form of PATTERNS, shared by every scanner in the process."""
+        if not self.rules:
+            return get_pattern_set(self.PATTERNS)
+        overridden = {rule.id for rule in self.rules}
+        return get_pattern_set({
+            name: pattern for name, pattern in self.PATTERNS.items() if name not in overridden
+        })
+    
+    @property
+    def rules_fingerprint(self) -> str:
+        """Fingerprint of everything that decides what a scan matches.
+        
+        Covers the patterns and rules and the options that change which
+        matches are kept: honeytokens-only mode (with the honeytokens it
+        looks for), checksum validation and the time budgets.
+        """
+        options = {
+            'honeytokens_only': self.honeytokens_only,
+            'validate_checksums': self.validate_checksums,
+            'file_time_budget': self.file_time_budget,
+            'rule_time_budget': self.rule_time_budget
+        }
+        if self.honeytokens_only:
+            options['honeytokens'] = sorted(self.honeytokens)
+        key = json.dumps({
+            'patterns': self.pattern_set.fingerprint,
+            'rules': [rule.to_dict() for rule in self.rules],
+            'options': options
+        }, sort_keys=True)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    @property
+    def scan_results(self) -> List[Dict]:
+        """Scan history."""
+        if self._scan_results is None:
+            self._scan_results = self._load_scan_results()
+        return self._scan_results
+    
+    @scan_results.setter
+    def scan_results(self, value: List[Dict]):
+        self._scan_results = value
     
     def _load_honeytokens(self) -> Dict:
         """Load honeytokens for comparison."""
@@ -85,10 +486,10 @@ class TokenScanner:
     def _save_scan_results(self):
         """Save scan results to file."""
         with open(self.scan_results_file, 'w') as f:
-            json.dump({'scans': self.scan_results}, f, indent=2)
+            json.dump({'scans': self.scan_results}, f, indent=2, default=json_default)
     
-    def should_scan_file(self, file_path: str) -> bool:
-        """Check if a file should be scanned."""
+    def should_scan_path(self, file_path: str, file_size: int = None) -> bool:
+        """Check if a path should be scanned, without touching the filesystem."""
         path = Path(file_path)
         
         # Check file extension
@@ -101,110 +502,386 @@ class TokenScanner:
                 return False
         
         # Check file size (skip files larger than 10MB)
+        if file_size is not None and file_size > self.MAX_FILE_SIZE:
+            return False
+        
+        return True
+    
+    def should_scan_file(self, file_path: str) -> bool:
+        """Check if a file should be scanned."""
+        if self.scan_archives:
+            from archive_reader import MAX_ARCHIVE_SIZE, is_archive
+            
+            # Build artifacts usually live in excluded directories such as
+            # dist and target, so archives are scanned wherever they are
+            if is_archive(file_path):
+                try:
+                    return os.path.getsize(file_path) <= MAX_ARCHIVE_SIZE
+                except OSError:
+                    return False
+        
+        if not self.should_scan_path(file_path):
+            return False
+        
         try:
-            if os.path.getsize(file_path) > 10 * 1024 * 1024:
-                return False
+            return os.path.getsize(file_path) <= self.MAX_FILE_SIZE
         except OSError:
             return False
+    
+    def scan_text(self, text: str, source: str = 'unknown', path: str = None,
+                  scope_rules: bool = True, errors: List[Dict] = None) -> List[Dict]:
+        """Scan text content for tokens.
         
-        return True
+        Args:
+            text: Content to scan
+            source: Label recorded on findings
+            path: File path used to scope rule-pack rules (defaults to source)
+            scope_rules: Set to False to run every rule whatever its path
+                scope, for content shared by several paths (see in_scope)
+            errors: List that time budget overruns are appended to
+        """
+        if self.honeytokens_only:
+            return self.scan_honeytokens(text, source)
+        
+        findings = []
+        # One timestamp for the whole text rather than one per match
+        detected_at = datetime.utcnow().isoformat()
+        budget = None
+        if self.file_time_budget is not None or self.rule_time_budget is not None:
+            started = time.perf_counter()
+            budget = {
+                'source': source,
+                'started': started,
+                'deadline': (started + self.file_time_budget
+                             if self.file_time_budget is not None else float('inf')),
+                'exhausted': False
+            }
+        
+        for token_type, regex in self.pattern_set:
+            matches = self._finditer(regex, text, token_type, budget, errors)
+            for match, line_number in _with_line_numbers(matches, text):
+                if not self.is_plausible(token_type, match):
+                    continue
+                findings.append(self.build_finding(
+                    token_type,
+                    match.group(0),
+                    source,
+                    match.start(),
+                    line_number,
+                    detected_at
+                ))
+        
+        lowered = None
+        for rule in self.rules:
+            if scope_rules and not rule.applies_to(path or source):
+                continue
+            if rule.keywords:
+                if lowered is None:
+                    lowered = text.lower()
+                if not rule.prefilter(lowered):
+                    continue
+            matches = self._finditer(rule.compiled, text, rule.id, budget, errors)
+            for match, line_number in _with_line_numbers(matches, text):
+                if rule.accepts(match.group(0)):
+                    findings.append(self.build_finding(
+                        rule.id,
+                        match.group(0),
+                        source,
+                        match.start(),
+                        line_number,
+                        detected_at
+                    ))
+        
+        return findings
     
-    def scan_text(self, text: str, source: str = 'unknown') -> List[Dict]:
-        """Scan text content for tokens."""
+    def scan_honeytokens(self, text: str, source: str = 'unknown',
+                         first_only: bool = False) -> List[Finding]:
+        """Search text for the exact values of registered honeytokens only.
+        
+        Much cheaper than scan_text when only the leak tripwire matters.
+        
+        Args:
+            text: Content to scan
+            source: Label recorded on findings
+            first_only: Only report the honeytoken found earliest in the text
+        """
+        hits = self.honeytoken_matcher.finditer(text)
+        if first_only:
+            # Matches come in no particular order, so take the earliest
+            first = min(hits, default=None)
+            hits = [first] if first is not None else []
+        
         findings = []
+        detected_at = datetime.utcnow().isoformat()
+        line, counted = 1, 0
+        for position, value in sorted(hits):
+            line += text.count('\n', counted, position)
+            counted = position
+            finding = self.build_finding(self.honeytokens[value].get('token_type', 'honeytoken'),
+                                         value, source, position, line, detected_at)
+            findings.append(finding)
+        
+        return findings
+    
+    def _finditer(self, regex: Pattern, text: str, token_type: str,
+                  budget: Dict = None, errors: List[Dict] = None) -> Iterator:
+        """Yield the matches of a pattern, stopping once a time budget runs out.
+        
+        Args:
+            budget: Per-text state from scan_text (None when no budget is set)
+            errors: List that an overrun is appended to
+        """
+        if budget is None:
+            yield from regex.finditer(text)
+            return
+        if budget['exhausted']:
+            return
+        
+        started = time.perf_counter()
+        deadline = budget['deadline']
+        if self.rule_time_budget is not None:
+            deadline = min(deadline, started + self.rule_time_budget)
         
-        for token_type, pattern in self.PATTERNS.items():
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                token_value = match.group(0)
-                
-                # Check if it's a honeytoken
-                is_honeytoken = token_value in self.honeytokens
-                
-                finding = {
-                    'token_type': token_type,
-                    'token_value': token_value,
-                    'token_preview': token_value[:20] + '...' if len(token_value) > 20 else token_value,
-                    'source': source,
-                    'position': match.start(),
-                    'line_number': text[:match.start()].count('\n') + 1,
-                    'is_honeytoken': is_honeytoken,
-                    'honeytoken_id': self.honeytokens[token_value]['token_id'] if is_honeytoken else None,
-                    'detected_at': datetime.utcnow().isoformat(),
-                }
-                
-                findings.append(finding)
+        try:
+            interruptible = _compile_interruptible(regex.pattern)
+            if interruptible is not None:
+                yield from interruptible.finditer(
+                    text, timeout=max(deadline - time.perf_counter(), 0.001))
+            else:
+                yield from _finditer_segments(regex, text, deadline)
+        except TimeoutError:
+            now = time.perf_counter()
+            if now >= budget['deadline']:
+                # Later patterns would time out straight away
+                budget['exhausted'] = True
+                scope, limit, elapsed = 'file', self.file_time_budget, now - budget['started']
+            else:
+                scope, limit, elapsed = 'rule', self.rule_time_budget, now - started
+            if errors is not None:
+                errors.append({
+                    'file': budget['source'],
+                    'error': f"{scope.capitalize()} time budget of {limit}s exceeded "
+                             f"while matching {token_type}",
+                    'type': 'timeout',
+                    'budget': scope,
+                    'rule': token_type,
+                    'elapsed': round(elapsed, 3)
+                })
+    
+    def is_plausible(self, token_type: str, match) -> bool:
+        """Check a built-in pattern match looks like a real token before it becomes a finding.
+        
+        Low-entropy generic secrets, JWTs whose header does not decode and
+        (with validate_checksums) GitHub tokens failing their checksum are
+        rejected. Known honeytokens always pass.
+        """
+        threshold = self.ENTROPY_THRESHOLDS.get(token_type)
+        if threshold is not None:
+            # Patterns with groups capture the secret itself in the last one
+            secret = match.group(match.lastindex) if match.lastindex else match.group(0)
+            plausible = shannon_entropy(secret) >= threshold
+        elif token_type == 'jwt_token':
+            plausible = jwt_header_valid(match.group(0))
+        elif self.validate_checksums and token_type in self.CHECKSUM_TOKEN_TYPES:
+            plausible = github_checksum_valid(match.group(0))
+        else:
+            return True
+        
+        return plausible or match.group(0) in self.honeytokens
+    
+    def scan_hunk(self, hunk: Dict) -> List[Dict]:
+        """Scan a diff hunk, keeping only findings that touch an added line.
+        
+        Args:
+            hunk: Dict with path, start_line and lines, a list of
+                (text, is_added) as yielded by git_reader.iter_diff_hunks
+        
+        Returns:
+            Findings with line numbers in the new version of the file
+        """
+        added = {
+            hunk['start_line'] + i
+            for i, (_, is_added) in enumerate(hunk['lines']) if is_added
+        }
+        if not added:
+            return []
+        
+        findings = []
+        text = '\n'.join(line for line, _ in hunk['lines'])
+        for finding in self.scan_text(text, source=hunk['path']):
+            first_line = hunk['start_line'] + finding['line_number'] - 1
+            last_line = first_line + finding['token_value'].count('\n')
+            if not any(line in added for line in range(first_line, last_line + 1)):
+                continue
+            # Offsets within the hunk are meaningless for the whole file
+            finding['line_number'] = first_line
+            finding['position'] = None
+            finding['file_path'] = hunk['path']
+            findings.append(finding)
         
         return findings
     
+    def in_scope(self, token_type: str, path: str) -> bool:
+        """Check whether findings of a type apply to a path under rule-pack scopes."""
+        for rule in self.rules:
+            if rule.id == token_type:
+                return rule.applies_to(path)
+        return True
+    
+    def build_finding(self, token_type: str, token_value: str, source: str,
+                      position: int, line_number: int, detected_at: str = None) -> Finding:
+        """Build a finding record for a matched token."""
+        # Check if it's a honeytoken
+        honeytoken = self.honeytokens.get(token_value)
+        
+        return Finding(
+            token_type,
+            token_value,
+            source,
+            position,
+            line_number,
+            honeytoken is not None,
+            honeytoken['token_id'] if honeytoken is not None else None,
+            detected_at or datetime.utcnow().isoformat()
+        )
+    
     def scan_file(self, file_path: str) -> Tuple[List[Dict], Dict]:
         """Scan a single file for tokens."""
         if not self.should_scan_file(file_path):
             return [], {'skipped': True, 'reason': 'File excluded or too large'}
         
+        if self.scan_archives:
+            from archive_reader import is_archive
+            if is_archive(file_path):
+                return self.scan_archive(file_path)
+        
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
         except Exception as e:
             return [], {'error': str(e)}
         
-        findings = self.scan_text(content, source=file_path)
+        timeouts = []
+        findings = self.scan_text(content, source=file_path, errors=timeouts)
         
         metadata = {
             'file_path': file_path,
             'file_size': os.path.getsize(file_path),
             'findings_count': len(findings),
-            'scanned_at': datetime.utcnow().isoformat()
+            'scanned_at': datetime.utcnow().isoformat(),
+            'timeouts': timeouts
         }
         
         return findings, metadata
     
-    def scan_directory(self, directory: str, recursive: bool = True) -> Dict:
-        """Scan an entire directory for tokens."""
-        all_findings = []
-        scanned_files = []
-        skipped_files = []
-        errors = []
+    def scan_archive(self, file_path: str) -> Tuple[List[Dict], Dict]:
+        """Scan the members of an archive without extracting it to disk.
+        
+        Findings have `archive!member` sources. Members that break a size,
+        compression ratio or nesting limit are reported in the metadata's
+        archive_errors instead of being read (see archive_reader).
+        """
+        from archive_reader import iter_archive_items
         
+        findings = []
+        timeouts = []
+        archive_errors = []
+        members = 0
+        for item in iter_archive_items(file_path, self, archive_errors):
+            members += 1
+            findings.extend(self.scan_text(item['text'], source=item['source'],
+                                           path=item['path'], errors=timeouts))
+        
+        metadata = {
+            'file_path': file_path,
+            'file_size': os.path.getsize(file_path),
+            'findings_count': len(findings),
+            'members_scanned': members,
+            'scanned_at': datetime.utcnow().isoformat(),
+            'timeouts': timeouts,
+            'archive_errors': archive_errors
+        }
+        
+        return findings, metadata
+    
+    def iter_scan_directory(self, directory: str, recursive: bool = True,
+                            shard: Tuple[int, int] = None) -> Iterator[Dict]:
+        """Scan a directory file by file, yielding each file's result as soon as it is done.
+        
+        With `shard` set to (index, count), only files whose path relative to
+        the directory hashes to that shard are scanned (see path_shard), so
+        `count` jobs scanning the same tree split it without overlap.
+        
+        Yields:
+            Dicts with file, status ('scanned', 'skipped' or 'error'),
+            findings and errors (read failures and time budget overruns;
+            findings made before a timeout are kept)
+        """
         if recursive:
             file_iterator = Path(directory).rglob('*')
         else:
             file_iterator = Path(directory).glob('*')
         
+        if shard is not None and not 0 <= shard[0] < shard[1]:
+            raise ValueError(f"Invalid shard {shard[0]} of {shard[1]}")
+        
         for file_path in file_iterator:
-            if file_path.is_file():
-                file_path_str = str(file_path)
-                
-                if not self.should_scan_file(file_path_str):
-                    skipped_files.append(file_path_str)
-                    continue
-                
-                findings, metadata = self.scan_file(file_path_str)
-                
-                if 'error' in metadata:
-                    errors.append({'file': file_path_str, 'error': metadata['error']})
-                elif 'skipped' not in metadata:
-                    scanned_files.append(file_path_str)
-                    if findings:
-                        all_findings.extend(findings)
+            if shard is not None and path_shard(file_path.relative_to(directory).as_posix(),
+                                                shard[1]) != shard[0]:
+                continue
+            if not file_path.is_file():
+                continue
+            file_path_str = str(file_path)
+            findings, metadata = self.scan_file(file_path_str)
+            
+            if 'error' in metadata:
+                yield {'file': file_path_str, 'status': 'error', 'findings': [],
+                       'errors': [{'file': file_path_str, 'error': metadata['error']}]}
+            elif 'skipped' in metadata:
+                yield {'file': file_path_str, 'status': 'skipped', 'findings': [], 'errors': []}
+            else:
+                yield {'file': file_path_str, 'status': 'scanned', 'findings': findings,
+                       'errors': metadata['timeouts'] + metadata.get('archive_errors', [])}
+    
+    def iter_findings(self, directory: str, recursive: bool = True) -> Iterator[Finding]:
+        """Yield the findings of a directory scan as each file is scanned."""
+        for result in self.iter_scan_directory(directory, recursive):
+            yield from result['findings']
+    
+    def scan_directory(self, directory: str, recursive: bool = True,
+                       shard: Tuple[int, int] = None) -> Dict:
+        """Scan an entire directory, or one shard of it, for tokens."""
+        started_at = datetime.utcnow()
+        all_findings = []
+        scanned_files = []
+        counts = {'scanned': 0, 'skipped': 0, 'error': 0}
+        errors = []
+        
+        for result in self.iter_scan_directory(directory, recursive, shard):
+            counts[result['status']] += 1
+            errors.extend(result['errors'])
+            all_findings.extend(result['findings'])
+            if result['status'] == 'scanned' and len(scanned_files) < 100:
+                scanned_files.append(result['file'])
         
         scan_result = {
-            'scan_id': datetime.utcnow().strftime('%Y%m%d%H%M%S'),
+            'scan_id': started_at.strftime('%Y%m%d%H%M%S'),
             'scan_type': 'directory',
             'target': directory,
             'recursive': recursive,
-            'started_at': datetime.utcnow().isoformat(),
-            'total_files_scanned': len(scanned_files),
-            'total_files_skipped': len(skipped_files),
+            'started_at': started_at.isoformat(),
+            'total_files_scanned': counts['scanned'],
+            'total_files_skipped': counts['skipped'],
             'total_findings': len(all_findings),
             'honeytokens_found': sum(1 for f in all_findings if f['is_honeytoken']),
             'findings': all_findings,
-            'scanned_files': scanned_files[:100],  # Limit to first 100
+            'scanned_files': scanned_files,  # Limited to the first 100
             'errors': errors
         }
+        if shard is not None:
+            scan_result['shard'] = {'index': shard[0], 'count': shard[1]}
         
-        self.scan_results.append(scan_result)
-        self._save_scan_results()
+        self.record_scan(scan_result)
         
         return scan_result
     
@@ -226,11 +903,16 @@ class TokenScanner:
             'findings': findings
         }
         
-        self.scan_results.append(scan_result)
-        self._save_scan_results()
+        self.record_scan(scan_result)
         
         return scan_result
     
+    def record_scan(self, scan_result: Dict):
+        """Append a scan result to the scan history and save it."""
+        self.scan_results.append(scan_result)
+        if self.persist:
+            self._save_scan_results()
+    
     def get_scan_history(self, limit: int = 10) -> List[Dict]:
         """Get recent scan history."""
         return self.scan_results[-limit:]
@@ -255,6 +937,7 @@ class TokenScanner:
 def main():
     """CLI interface for the token scanner."""
     import argparse
+    import sys
     
     parser = argparse.ArgumentParser(description='Scan for leaked tokens')
     parser.add_argument('target', nargs='?', help='File or directory to scan')
@@ -263,10 +946,34 @@ def main():
     parser.add_argument('--detections', action='store_true', help='Show honeytoken detections')
     parser.add_argument('--recursive', action='store_true', default=True,
                        help='Recursively scan directories')
+    parser.add_argument('--rules', action='append', default=[],
+                       help='Rule pack (TOML/YAML) adding token rules (repeatable)')
+    parser.add_argument('--file-budget', type=float,
+                       help='Seconds allowed for matching one file')
+    parser.add_argument('--rule-budget', type=float,
+                       help='Seconds allowed for one pattern on one file')
+    parser.add_argument('--verify-checksums', action='store_true',
+                       help='Drop GitHub tokens whose built-in checksum does not match')
+    parser.add_argument('--stream', action='store_true',
+                       help='Print directory findings as JSON lines as soon as each file is scanned')
+    parser.add_argument('--honeytokens-only', action='store_true',
+                       help='Only look for registered honeytoken values (much faster)')
+    parser.add_argument('--first', action='store_true',
+                       help='Stop at the first honeytoken found and exit 1 (implies --honeytokens-only)')
+    parser.add_argument('--archives', action='store_true',
+                       help='Also scan inside zip, jar, whl, tar and compressed files')
     
     args = parser.parse_args()
     
-    scanner = TokenScanner()
+    try:
+        scanner = TokenScanner(rule_packs=args.rules, file_time_budget=args.file_budget,
+                               rule_time_budget=args.rule_budget,
+                               validate_checksums=args.verify_checksums,
+                               honeytokens_only=args.honeytokens_only or args.first,
+                               scan_archives=args.archives)
+    except (OSError, ValueError) as e:
+        print(f"Error loading rule pack: {e}")
+        sys.exit(2)
     
     if args.history:
         history = scanner.get_scan_history(limit=5)
@@ -293,16 +1000,32 @@ def main():
             print(f"\n- Type: {finding['token_type']}")
             print(f"  Value: {finding['token_preview']}")
             print(f"  Honeytoken: {finding['is_honeytoken']}")
+    elif args.target and args.first:
+        if os.path.isdir(args.target):
+            finding = next(scanner.iter_findings(args.target, args.recursive), None)
+        else:
+            finding = next(iter(scanner.scan_file(args.target)[0]), None)
+        if finding is None:
+            print("No honeytoken found")
+            return
+        print(f"🚨 Honeytoken {finding['honeytoken_id']} ({finding['token_type']}) found in "
+              f"{finding['source']}, line {finding['line_number']}")
+        sys.exit(1)
     elif args.target:
         if os.path.isfile(args.target):
             findings, metadata = scanner.scan_file(args.target)
             print(f"\n=== File Scan: {args.target} ===")
             print(f"Findings: {len(findings)}")
+            for error in metadata.get('timeouts', []) + metadata.get('archive_errors', []):
+                print(f"⚠️  {error['file']}: {error['error']}")
             for finding in findings:
                 print(f"\n- Type: {finding['token_type']}")
                 print(f"  Line: {finding['line_number']}")
                 print(f"  Value: {finding['token_preview']}")
                 print(f"  Honeytoken: {finding['is_honeytoken']}")
+        elif os.path.isdir(args.target) and args.stream:
+            for finding in scanner.iter_findings(args.target, args.recursive):
+                print(json.dumps(finding, default=json_default), flush=True)
         elif os.path.isdir(args.target):
             result = scanner.scan_directory(args.target, args.recursive)
             print(f"\n=== Directory Scan: {args.target} ===")
@@ -317,6 +1040,11 @@ def main():
                     print(f"\n- {finding['token_type']} in {finding['source']}")
                     print(f"  Line: {finding['line_number']}")
                     print(f"  Honeytoken: {finding['is_honeytoken']}")
+            
+            if result['errors']:
+                print(f"\n--- Errors ({len(result['errors'])}) ---")
+                for error in result['errors']:
+                    print(f"- {error['file']}: {error['error']}")
         else:
             print(f"Error: {args.target} is not a valid file or directory")
     else:
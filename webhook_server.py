@@ -5,12 +5,67 @@ HTTP server that receives callbacks when honeytokens are used.
 
 import json
 import os
+import queue
 from datetime import datetime
-from typing import Dict
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 import threading
 
+from rate_limiter import KeyedRateLimiter
+
+
+class EventWriter(threading.Thread):
+    """Background thread that drains the ingest queue and persists events in batches."""
+    
+    def __init__(self, handler_class, flush_interval: float = 1.0):
+        """Initialize writer for a handler class."""
+        super().__init__(daemon=True)
+        self.handler_class = handler_class
+        self.flush_interval = flush_interval
+        self.stop_event = threading.Event()
+    
+    def run(self):
+        """Drain the queue until stopped, flushing at most once per interval."""
+        while not self.stop_event.is_set():
+            self.flush(timeout=self.flush_interval)
+        self.flush(timeout=0)
+    
+    def flush(self, timeout: float = 0):
+        """Move queued events and shed summaries into storage and save once.
+        
+        The events are copied under the handler lock and written to disk
+        outside it, so requests aren't held up by the file write.
+        """
+        handler = self.handler_class
+        batch = []
+        try:
+            if timeout:
+                batch.append(handler.ingest_queue.get(timeout=timeout))
+            while True:
+                batch.append(handler.ingest_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        # save_lock keeps snapshots and writes in the same order, so an older
+        # snapshot never overwrites a newer one
+        with handler.save_lock:
+            with handler.lock:
+                shed_events = handler._drain_shed_summary()
+                if not batch and not shed_events:
+                    return
+                handler.events.extend(batch)
+                handler.events.extend(shed_events)
+                if len(handler.events) > handler.max_events:
+                    del handler.events[:len(handler.events) - handler.max_events]
+                events = list(handler.events)
+            handler._save_events(events)
+    
+    def stop(self):
+        """Stop the writer after a final flush."""
+        self.stop_event.set()
+        self.join(timeout=5)
+
 
 class WebhookHandler(BaseHTTPRequestHandler):
     """Handle incoming webhook requests."""
@@ -18,6 +73,60 @@ class WebhookHandler(BaseHTTPRequestHandler):
     # Shared storage for webhook events
     events = []
     events_file = 'webhook_events.json'
+    max_events = 10000
+    max_body_size = 64 * 1024
+    
+    # Backpressure: per-IP and per-token rate limits and a bounded ingest queue
+    ip_limiter = KeyedRateLimiter(rate=5, capacity=20)
+    token_limiter = KeyedRateLimiter(rate=2, capacity=10)
+    ingest_queue = queue.Queue(maxsize=1000)
+    
+    # Load-shedding summary: one sampled event plus a count per (reason, key)
+    shed_summary = {}
+    shed_totals = {}
+    max_shed_keys = 1000
+    
+    lock = threading.Lock()
+    save_lock = threading.Lock()
+    writer = None
+    
+    @classmethod
+    def configure(cls, ip_rate: float = None, ip_burst: float = None,
+                  token_rate: float = None, token_burst: float = None,
+                  queue_size: int = None, max_events: int = None):
+        """Configure rate limits and queue bounds."""
+        if ip_rate is not None or ip_burst is not None:
+            cls.ip_limiter = KeyedRateLimiter(
+                rate=ip_rate if ip_rate is not None else cls.ip_limiter.rate,
+                capacity=ip_burst if ip_burst is not None else cls.ip_limiter.capacity
+            )
+        if token_rate is not None or token_burst is not None:
+            cls.token_limiter = KeyedRateLimiter(
+                rate=token_rate if token_rate is not None else cls.token_limiter.rate,
+                capacity=token_burst if token_burst is not None else cls.token_limiter.capacity
+            )
+        if queue_size is not None:
+            cls.ingest_queue = queue.Queue(maxsize=queue_size)
+        if max_events is not None:
+            cls.max_events = max_events
+    
+    @classmethod
+    def start_writer(cls, flush_interval: float = 1.0):
+        """Start the background event writer if it is not running."""
+        with cls.lock:
+            if cls.writer is not None and cls.writer.is_alive():
+                return cls.writer
+            cls._load_events()
+            cls.writer = EventWriter(cls, flush_interval=flush_interval)
+            cls.writer.start()
+            return cls.writer
+    
+    @classmethod
+    def stop_writer(cls):
+        """Stop the background event writer, flushing pending events."""
+        if cls.writer is not None:
+            cls.writer.stop()
+            cls.writer = None
     
     def _set_headers(self, status_code=200, content_type='application/json'):
         """Set response headers."""
@@ -28,23 +137,94 @@ class WebhookHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
     
-    def _save_events(self):
-        """Save events to file."""
+    @classmethod
+    def _save_events(cls, events: List[Dict] = None):
+        """Save events (by default the stored events) to file."""
         try:
-            with open(self.events_file, 'w') as f:
-                json.dump({'events': self.events}, f, indent=2)
+            with open(cls.events_file, 'w') as f:
+                json.dump({'events': cls.events if events is None else events}, f, indent=2)
         except Exception as e:
             print(f"Error saving events: {e}")
     
-    def _load_events(self):
+    @classmethod
+    def _load_events(cls):
         """Load events from file."""
-        if os.path.exists(self.events_file):
+        if os.path.exists(cls.events_file):
             try:
-                with open(self.events_file, 'r') as f:
+                with open(cls.events_file, 'r') as f:
                     data = json.load(f)
-                    self.events = data.get('events', [])
+                    cls.events = data.get('events', [])
             except json.JSONDecodeError:
-                self.events = []
+                cls.events = []
+    
+    @classmethod
+    def _record_shed(cls, reason: str, key: str, sample: Dict):
+        """Count a shed request, keeping the first one per key as a sample."""
+        now = datetime.utcnow().isoformat()
+        with cls.lock:
+            cls.shed_totals[reason] = cls.shed_totals.get(reason, 0) + 1
+            summary_key = (reason, key)
+            if summary_key not in cls.shed_summary and len(cls.shed_summary) >= cls.max_shed_keys:
+                summary_key = (reason, '*')
+            entry = cls.shed_summary.get(summary_key)
+            if entry is None:
+                entry = {
+                    'reason': reason,
+                    'key': summary_key[1],
+                    'count': 0,
+                    'first_seen': now,
+                    'sample': sample
+                }
+                cls.shed_summary[summary_key] = entry
+            entry['count'] += 1
+            entry['last_seen'] = now
+    
+    @classmethod
+    def _drain_shed_summary(cls) -> list:
+        """Convert pending shed summaries into events (caller holds the lock)."""
+        shed_events = [{
+            'event_id': datetime.utcnow().strftime('%Y%m%d%H%M%S%f'),
+            'received_at': entry['last_seen'],
+            'type': 'shed',
+            'reason': entry['reason'],
+            'key': entry['key'],
+            'count': entry['count'],
+            'first_seen': entry['first_seen'],
+            'sample': entry['sample']
+        } for entry in cls.shed_summary.values()]
+        cls.shed_summary = {}
+        return shed_events
+    
+    def _sample(self) -> Dict:
+        """Build a lightweight sample of the current request."""
+        return {
+            'path': self.path[:200],
+            'source_ip': self.client_address[0],
+            'user_agent': self.headers.get('User-Agent', 'Unknown')[:200]
+        }
+    
+    def _reject(self, status_code: int, reason: str, key: str,
+                retry_after: float = None):
+        """Shed a request and send an error response."""
+        self._record_shed(reason, key, self._sample())
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        if retry_after is not None:
+            self.send_header('Retry-After', str(max(1, int(retry_after + 0.999))))
+        self.end_headers()
+        self.wfile.write(json.dumps({'error': reason}).encode())
+    
+    def _ingest(self, event: Dict) -> bool:
+        """Queue an event for persistence; shed it if the queue is full."""
+        if self.writer is None or not self.writer.is_alive():
+            self.start_writer()
+        try:
+            self.ingest_queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self._reject(503, 'queue_full', event.get('token_id') or event['source_ip'],
+                         retry_after=1)
+            return False
     
     def do_OPTIONS(self):
         """Handle OPTIONS request (CORS preflight)."""
@@ -103,21 +283,23 @@ curl -X POST http://localhost:8080/webhook \\
                 'status': 'healthy',
                 'service': 'honeytoken-webhook-server',
                 'timestamp': datetime.utcnow().isoformat(),
-                'total_events': len(self.events)
+                'total_events': len(self.events),
+                'queue_depth': self.ingest_queue.qsize(),
+                'shed_totals': dict(self.shed_totals)
             }
             self.wfile.write(json.dumps(response).encode())
         
         elif parsed_path.path == '/events':
             # List recent events
-            self._load_events()
             query_params = parse_qs(parsed_path.query)
             limit = int(query_params.get('limit', [50])[0])
             
+            with self.lock:
+                response = {
+                    'total_events': len(self.events),
+                    'events': self.events[-limit:]
+                }
             self._set_headers(200)
-            response = {
-                'total_events': len(self.events),
-                'events': self.events[-limit:]
-            }
             self.wfile.write(json.dumps(response, indent=2).encode())
         
         else:
@@ -128,30 +310,60 @@ curl -X POST http://localhost:8080/webhook \\
     
     def do_POST(self):
         """Handle POST requests."""
+        source_ip = self.client_address[0]
+        
+        # Cheap per-IP check before reading the body
+        if not self.ip_limiter.allow(source_ip):
+            self._reject(429, 'rate_limited_ip', source_ip,
+                         retry_after=self.ip_limiter.retry_after(source_ip))
+            return
+        
         content_length = int(self.headers.get('Content-Length', 0))
+        if content_length > self.max_body_size:
+            self._reject(413, 'payload_too_large', source_ip)
+            return
         post_data = self.rfile.read(content_length)
         
         parsed_path = urlparse(self.path)
         
         try:
             payload = json.loads(post_data.decode('utf-8'))
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, UnicodeDecodeError):
             self._set_headers(400)
             response = {'error': 'Invalid JSON payload'}
             self.wfile.write(json.dumps(response).encode())
             return
         
+        if not isinstance(payload, dict):
+            self._set_headers(400)
+            response = {'error': 'Payload must be a JSON object'}
+            self.wfile.write(json.dumps(response).encode())
+            return
+        
+        token_id = self._token_key(parsed_path.path, payload)
+        if token_id is not None and not self.token_limiter.allow(token_id):
+            self._reject(429, 'rate_limited_token', token_id,
+                         retry_after=self.token_limiter.retry_after(token_id))
+            return
+        
         # Process webhook based on path
         if parsed_path.path == '/webhook':
             self._handle_webhook(payload)
         elif parsed_path.path.startswith('/callback/'):
-            token_id = parsed_path.path.split('/')[-1]
             self._handle_callback(token_id, payload)
         else:
             self._set_headers(404)
             response = {'error': 'Endpoint not found'}
             self.wfile.write(json.dumps(response).encode())
     
+    @staticmethod
+    def _token_key(path: str, payload: Dict) -> Optional[str]:
+        """Get the token ID a request refers to, for per-token rate limiting."""
+        if path.startswith('/callback/'):
+            return path.split('/')[-1]
+        token_id = payload.get('token_id')
+        return str(token_id)[:200] if token_id is not None else None
+    
     def _handle_webhook(self, payload: Dict):
         """Handle general webhook."""
         event = {
@@ -163,8 +375,8 @@ curl -X POST http://localhost:8080/webhook \\
             'user_agent': self.headers.get('User-Agent', 'Unknown')
         }
         
-        self.events.append(event)
-        self._save_events()
+        if not self._ingest(event):
+            return
         
         # Check if this is a honeytoken usage
         if payload.get('event') == 'token_used' or 'token_id' in payload:
@@ -210,8 +422,8 @@ curl -X POST http://localhost:8080/webhook \\
             'user_agent': self.headers.get('User-Agent', 'Unknown')
         }
         
-        self.events.append(event)
-        self._save_events()
+        if not self._ingest(event):
+            return
         
         print(f"\n🚨 HONEYTOKEN CALLBACK!")
         print(f"   Token ID: {token_id}")
@@ -263,7 +475,9 @@ class WebhookServer:
     
     def start(self, background: bool = False):
         """Start the webhook server."""
-        self.server = HTTPServer((self.host, self.port), WebhookHandler)
+        self.server = ThreadingHTTPServer((self.host, self.port), WebhookHandler)
+        self.port = self.server.server_address[1]
+        WebhookHandler.start_writer()
         
         print(f"\n🍯 Honeytoken Webhook Server")
         print(f"   Listening on http://{self.host}:{self.port}")
@@ -285,6 +499,7 @@ class WebhookServer:
         if self.server:
             self.server.shutdown()
             self.server.server_close()
+            WebhookHandler.stop_writer()
             print("Webhook server stopped")
     
     def is_running(self) -> bool:
@@ -303,6 +518,9 @@ def main():
     parser.add_argument('--port', type=int, default=8080, help='Port to bind to')
     parser.add_argument('--test', action='store_true', help='Send test webhook')
     parser.add_argument('--events', action='store_true', help='List recent events')
+    parser.add_argument('--ip-rate', type=float, help='Requests per second allowed per source IP')
+    parser.add_argument('--token-rate', type=float, help='Requests per second allowed per token')
+    parser.add_argument('--queue-size', type=int, help='Maximum number of events waiting to be saved')
     
     args = parser.parse_args()
     
@@ -339,12 +557,20 @@ def main():
                     print(f"\nEvent ID: {event['event_id']}")
                     print(f"Type: {event['type']}")
                     print(f"Time: {event['received_at']}")
-                    print(f"Source: {event['source_ip']}")
+                    if event['type'] == 'shed':
+                        print(f"Shed: {event['count']} request(s), {event['reason']} ({event['key']})")
+                    else:
+                        print(f"Source: {event['source_ip']}")
         else:
             print("No events found")
     
     else:
         # Start server
+        WebhookHandler.configure(
+            ip_rate=args.ip_rate,
+            token_rate=args.token_rate,
+            queue_size=args.queue_size
+        )
         server = WebhookServer(host=args.host, port=args.port)
         server.start()
 
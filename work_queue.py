@@ -0,0 +1,444 @@
+"""
+Work Queue Module
+Distributes scans across machines through a SQLite task queue with leased batches.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+# A task whose worker stops renewing its lease is handed to another worker;
+# workers renew before each task, so one task must finish within a lease
+DEFAULT_LEASE_SECONDS = 600
+
+# Tasks claimed this many times without completing (failed, or their
+# worker died) are given up on
+MAX_ATTEMPTS = 3
+
+
+class WorkQueue:
+    """Task queue in a SQLite file, shared by a coordinator and its workers.
+    
+    The file can live on storage every node mounts. Workers claim batches of
+    tasks under a time-limited lease, so tasks of a crashed worker return to
+    the queue once the lease runs out.
+    """
+    
+    def __init__(self, db_path: str):
+        """Open (and create if needed) a queue."""
+        self.db_path = db_path
+        # Autocommit; claims take the write lock explicitly
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+    
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def set_meta(self, key: str, value):
+        """Store a JSON-serialisable setting shared with workers."""
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                          (key, json.dumps(value)))
+    
+    def get_meta(self, key: str, default=None):
+        """Get a shared setting."""
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row['value']) if row else default
+    
+    def add_tasks(self, kind: str, targets: Iterable) -> int:
+        """Queue one task per target; targets are stored as JSON."""
+        rows = [(kind, json.dumps(target)) for target in targets]
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.executemany('INSERT INTO tasks (kind, target) VALUES (?, ?)', rows)
+        self.conn.execute('COMMIT')
+        return len(rows)
+    
+    def claim(self, worker: str, batch_size: int = 1,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS,
+              max_attempts: int = MAX_ATTEMPTS) -> List[Dict]:
+        """Lease up to `batch_size` pending tasks (or tasks whose lease expired).
+        
+        Every claim counts as an attempt, so a task that keeps killing its
+        worker is marked failed once its lease expires for the last time.
+        """
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute(
+                "UPDATE tasks SET status = 'failed', worker = NULL, lease_expires = NULL, "
+                "error = 'Lease expired on the last attempt (worker lost)' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, max_attempts)
+            )
+            rows = self.conn.execute(
+                "SELECT id, kind, target, attempts FROM tasks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT ?", (now, batch_size)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(worker, now + lease_seconds, row['id']) for row in rows]
+            )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return [{'id': row['id'], 'kind': row['kind'], 'target': json.loads(row['target']),
+                 'attempts': row['attempts'] + 1} for row in rows]
+    
+    def renew(self, task_id: int, worker: str,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a task's lease; False if the lease was lost to another worker."""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease_seconds, task_id, worker)
+        )
+        return cursor.rowcount == 1
+    
+    def complete(self, task_id: int, worker: str, result: Dict) -> bool:
+        """Store a task's result; False if the lease was lost to another worker."""
+        from token_scanner import json_default
+        
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (json.dumps(result, default=json_default), task_id, worker)
+        )
+        return cursor.rowcount == 1
+    
+    def fail(self, task_id: int, worker: str, error: str, max_attempts: int = MAX_ATTEMPTS):
+        """Record a failed attempt, requeueing the task until it runs out of attempts."""
+        self.conn.execute(
+            "UPDATE tasks SET error = ?, worker = NULL, lease_expires = NULL, "
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (error, max_attempts, task_id, worker)
+        )
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of tasks in each status."""
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for row in self.conn.execute('SELECT status, COUNT(*) AS n FROM tasks GROUP BY status'):
+            counts[row['status']] = row['n']
+        return counts
+    
+    def iter_tasks(self, status: str = None) -> Iterator[Dict]:
+        """Iterate over tasks, optionally of one status, with decoded results."""
+        query = 'SELECT * FROM tasks'
+        params = ()
+        if status is not None:
+            query += ' WHERE status = ?'
+            params = (status,)
+        for row in self.conn.execute(query + ' ORDER BY id', params):
+            task = dict(row)
+            task['target'] = json.loads(task['target'])
+            task['result'] = json.loads(task['result']) if task['result'] else None
+            yield task
+
+
+def _scanner_settings(scanner) -> Dict:
+    """Scanner settings workers need to reproduce the coordinator's scanner."""
+    return {
+        'rules': [rule.to_dict() for rule in scanner.rules],
+        'honeytokens': scanner.honeytokens,
+        'options': {
+            'file_time_budget': scanner.file_time_budget,
+            'rule_time_budget': scanner.rule_time_budget,
+            'validate_checksums': scanner.validate_checksums,
+            'honeytokens_only': scanner.honeytokens_only,
+            'scan_archives': scanner.scan_archives
+        }
+    }
+
+
+def _build_scanner(settings: Dict):
+    """Create a worker's scanner from the coordinator's settings."""
+    from rule_packs import Rule
+    from token_scanner import TokenScanner
+    
+    scanner = TokenScanner(persist=False, **settings['options'])
+    scanner.rules = [Rule(**rule) for rule in settings['rules']]
+    scanner.honeytokens = settings['honeytokens']
+    return scanner
+
+
+def plan_scan(queue: WorkQueue, scanner=None, directories: Iterable[str] = (),
+              repositories: Iterable[str] = (), files_per_task: int = 200,
+              append: bool = False) -> int:
+    """Coordinator: split directories into file batches and repositories into tasks.
+    
+    Paths are stored as absolute paths, so workers on other machines must
+    see the directories at the same location. With `append` the tasks are
+    added to the scan already in the queue.
+    
+    Returns:
+        Number of tasks queued
+    
+    Raises:
+        ValueError: If the queue already holds tasks and `append` is not set,
+            since merging would mix the previous scan into the new one
+    """
+    from pathlib import Path
+    
+    if scanner is None:
+        from token_scanner import TokenScanner
+        scanner = TokenScanner(persist=False)
+    directories = list(directories)
+    repositories = list(repositories)
+    
+    existing = sum(queue.counts().values())
+    if existing and not append:
+        raise ValueError(f"Queue already holds {existing} task(s) of another scan; "
+                         f"use a new queue file or append")
+    
+    scan = queue.get_meta('scan') if existing else None
+    if scan is None:
+        scan = {
+            'scan_id': datetime.utcnow().strftime('%Y%m%d%H%M%S'),
+            'started_at': datetime.utcnow().isoformat(),
+            'targets': []
+        }
+    scan['targets'] += directories + repositories
+    queue.set_meta('scanner', _scanner_settings(scanner))
+    queue.set_meta('scan', scan)
+    
+    queued = 0
+    for directory in directories:
+        files = sorted(
+            str(path) for path in Path(directory).resolve().rglob('*')
+            if path.is_file() and scanner.should_scan_file(str(path))
+        )
+        queued += queue.add_tasks('files', (
+            files[i:i + files_per_task] for i in range(0, len(files), files_per_task)
+        ))
+    queued += queue.add_tasks('github', repositories)
+    
+    return queued
+
+
+def _run_task(task: Dict, scanner, github=None) -> Dict:
+    """Scan one task and summarize its result."""
+    if task['kind'] == 'files':
+        findings = []
+        errors = []
+        scanned = 0
+        for file_path in task['target']:
+            file_findings, metadata = scanner.scan_file(file_path)
+            if 'error' in metadata:
+                errors.append({'file': file_path, 'error': metadata['error']})
+            elif 'skipped' not in metadata:
+                scanned += 1
+                errors.extend(metadata['timeouts'] + metadata.get('archive_errors', []))
+                findings.extend(file_findings)
+        return {'files_scanned': scanned, 'findings': findings, 'errors': errors}
+    
+    if task['kind'] == 'github':
+        owner, _, repo = task['target'].partition('/')
+        result = github.scan_repository_for_tokens(owner, repo, scanner, mode='tree')
+        return {'files_scanned': result['files_scanned'], 'findings': result['findings'],
+                'errors': result['errors']}
+    
+    raise ValueError(f"Unknown task kind: {task['kind']}")
+
+
+def run_worker(queue: WorkQueue, worker_id: str = None, batch_size: int = 4,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_interval: float = 1.0) -> Dict:
+    """Worker: claim and scan batches until no task is pending or leased.
+    
+    Returns:
+        Stats with tasks done and failed by this worker
+    """
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    scanner = _build_scanner(queue.get_meta('scanner'))
+    github = None
+    stats = {'worker': worker_id, 'done': 0, 'failed': 0}
+    
+    while True:
+        tasks = queue.claim(worker_id, batch_size, lease_seconds)
+        if not tasks:
+            counts = queue.counts()
+            if not counts['pending'] and not counts['leased']:
+                return stats
+            # Other workers hold the rest; wait in case one of them dies
+            time.sleep(poll_interval)
+            continue
+        
+        for task in tasks:
+            # The batch shares one lease taken at claim time; renew it so
+            # later tasks of a long batch are not reclaimed meanwhile
+            if not queue.renew(task['id'], worker_id, lease_seconds):
+                continue
+            if task['kind'] == 'github' and github is None:
+                from github_integration import GitHubIntegration
+                github = GitHubIntegration()
+            try:
+                result = _run_task(task, scanner, github)
+            except Exception as e:
+                queue.fail(task['id'], worker_id, str(e))
+                stats['failed'] += 1
+                continue
+            if queue.complete(task['id'], worker_id, result):
+                stats['done'] += 1
+
+
+def merge_results(queue: WorkQueue, scanner=None) -> Dict:
+    """Coordinator: merge finished tasks into a single scan record."""
+    scan = queue.get_meta('scan', {})
+    findings = []
+    errors = []
+    files_scanned = 0
+    
+    for task in queue.iter_tasks('done'):
+        files_scanned += task['result']['files_scanned']
+        findings.extend(task['result']['findings'])
+        errors.extend(task['result']['errors'])
+    for task in queue.iter_tasks('failed'):
+        errors.append({'task': task['id'], 'error': task['error']})
+    
+    scan_result = {
+        'scan_id': scan.get('scan_id', datetime.utcnow().strftime('%Y%m%d%H%M%S')),
+        'scan_type': 'distributed',
+        'target': ', '.join(scan.get('targets', [])),
+        'started_at': scan.get('started_at'),
+        'completed_at': datetime.utcnow().isoformat(),
+        'tasks': queue.counts(),
+        'total_files_scanned': files_scanned,
+        'total_findings': len(findings),
+        'honeytokens_found': sum(1 for f in findings if f['is_honeytoken']),
+        'findings': findings,
+        'errors': errors
+    }
+    
+    if scanner is not None:
+        scanner.record_scan(scan_result)
+    
+    return scan_result
+
+
+def main():
+    """CLI interface for distributed scans."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Distribute token scans across machines')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    plan_parser = subparsers.add_parser('coordinator', help='Queue the work of a scan')
+    plan_parser.add_argument('queue', help='Queue database (SQLite file)')
+    plan_parser.add_argument('--dir', action='append', default=[],
+                             help='Directory to scan (repeatable)')
+    plan_parser.add_argument('--github', action='append', default=[], metavar='OWNER/REPO',
+                             help='GitHub repository to scan (repeatable)')
+    plan_parser.add_argument('--files-per-task', type=int, default=200,
+                             help='Files in each directory task')
+    plan_parser.add_argument('--rules', action='append', default=[],
+                             help='Rule pack (TOML/YAML) adding token rules (repeatable)')
+    plan_parser.add_argument('--honeytokens-only', action='store_true',
+                             help='Only look for registered honeytoken values')
+    plan_parser.add_argument('--archives', action='store_true',
+                             help='Also scan inside zip, jar, whl, tar and compressed files')
+    plan_parser.add_argument('--append', action='store_true',
+                             help='Add the tasks to the scan already in the queue')
+    
+    worker_parser = subparsers.add_parser('worker', help='Scan queued tasks')
+    worker_parser.add_argument('queue', help='Queue database (SQLite file)')
+    worker_parser.add_argument('--id', help='Worker name (default: host:pid)')
+    worker_parser.add_argument('--batch-size', type=int, default=4,
+                               help='Tasks claimed at a time')
+    worker_parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                               help='Seconds before an unfinished batch is handed to another worker')
+    
+    merge_parser = subparsers.add_parser('merge', help='Merge results into one scan record')
+    merge_parser.add_argument('queue', help='Queue database (SQLite file)')
+    merge_parser.add_argument('--output', help='Also write the merged result to a JSON file')
+    
+    status_parser = subparsers.add_parser('status', help='Show task counts')
+    status_parser.add_argument('queue', help='Queue database (SQLite file)')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'status':
+        with WorkQueue(args.queue) as queue:
+            counts = queue.counts()
+        print(' '.join(f"{status}: {count}" for status, count in counts.items()))
+        return
+    
+    if args.command == 'worker':
+        if not os.path.exists(args.queue):
+            print(f"Error: queue {args.queue} does not exist")
+            sys.exit(2)
+        with WorkQueue(args.queue) as queue:
+            stats = run_worker(queue, args.id, args.batch_size, args.lease)
+        print(f"✓ Worker {stats['worker']}: {stats['done']} task(s) done, "
+              f"{stats['failed']} failed")
+        return
+    
+    from token_scanner import TokenScanner, json_default
+    
+    if args.command == 'coordinator':
+        try:
+            scanner = TokenScanner(rule_packs=args.rules, persist=False,
+                                   honeytokens_only=args.honeytokens_only,
+                                   scan_archives=args.archives)
+        except (OSError, ValueError) as e:
+            print(f"Error loading rule pack: {e}")
+            sys.exit(2)
+        with WorkQueue(args.queue) as queue:
+            try:
+                queued = plan_scan(queue, scanner, args.dir, args.github, args.files_per_task,
+                                   append=args.append)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(2)
+        print(f"✓ Queued {queued} task(s) in {args.queue}")
+        return
+    
+    with WorkQueue(args.queue) as queue:
+        result = merge_results(queue, TokenScanner())
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2, default=json_default)
+    
+    print(f"\n=== Distributed Scan {result['scan_id']} ===")
+    print(f"Tasks: {result['tasks']}")
+    print(f"Files scanned: {result['total_files_scanned']}")
+    print(f"Total findings: {result['total_findings']}")
+    print(f"Honeytokens found: {result['honeytokens_found']}")
+    if result['tasks']['pending'] or result['tasks']['leased']:
+        print("⚠️  Some tasks are unfinished; the merged result is partial")
+
+
+if __name__ == '__main__':
+    main()